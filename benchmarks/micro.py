@@ -0,0 +1,286 @@
+"""
+Micro-benchmarks of the hot paths of a request.
+
+Every benchmark is run in rounds long enough to be timed reliably, and the
+fastest and the median time per call are reported. The queries run against a
+temporary SQLite database, instrumented like the one of the application.
+
+Run from the project root with the application settings available::
+
+    python -m benchmarks.micro --output baseline.json
+
+and, after a change, compare against the stored results::
+
+    python -m benchmarks.micro --baseline baseline.json
+
+The comparison exits with status 1 if a benchmark got slower by more than
+``--tolerance``, so that it can gate a deploy. Only compare results from the
+same machine.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import inspect
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import typing
+from decimal import Decimal
+from pathlib import Path
+
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app import querylog, tracing
+from app.core import security
+from app.crud import complaint, refresh_token
+from app.models import metadata
+from app.models.complaint import ComplaintCreate, ComplaintUpdate
+from app.models.user import User
+
+from .serialization import default_path, fast_path, make_rows
+
+#: The page sizes the listing of complaints is measured at
+PAGE_SIZES = (1, 10, 100)
+PASSWORD = "benchmark-password"
+
+Benchmark = typing.Callable[[], typing.Union[typing.Awaitable[object], object]]
+
+
+async def measure(
+    func: Benchmark, *, rounds: int, min_time: float
+) -> dict[str, float]:
+    """Time a synchronous or asynchronous function.
+
+    Like :meth:`timeit.Timer.autorange`, the number of calls per round grows
+    until a round takes at least ``min_time`` seconds.
+
+    Args:
+        func: The function, called without arguments.
+
+    Keyword Args:
+        rounds: The number of timed rounds.
+        min_time: The shortest duration of a round in seconds.
+
+    Returns:
+        The number of calls per round and the fastest and the median time per
+        call in microseconds.
+    """
+    is_async = inspect.iscoroutinefunction(func)
+
+    async def run(number: int) -> float:
+        started_at = time.perf_counter()
+        for _ in range(number):
+            if is_async:
+                await func()  # type: ignore[misc]
+            else:
+                func()
+        return time.perf_counter() - started_at
+
+    number = 1
+    while (elapsed := await run(number)) < min_time:
+        number = max(number * 2, int(number * min_time / max(elapsed, 1e-9)))
+    timings = [await run(number) / number for _ in range(rounds)]
+    return {
+        "number": number,
+        "min_us": min(timings) * 1e6,
+        "median_us": statistics.median(timings) * 1e6,
+    }
+
+
+async def set_up(workdir: Path) -> tuple[AsyncEngine, User, str]:
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{workdir / 'benchmark.db'}"
+    )
+    querylog.instrument_engine(engine)
+    tracing.instrument_engine(engine)
+    async with engine.begin() as conn:
+        await conn.run_sync(metadata.create_all)
+
+    async with AsyncSession(engine, expire_on_commit=False) as db:
+        db_user = User(
+            email="bench@example.com",
+            first_name="Bench",
+            last_name="Mark",
+            phone="+4915112345678",
+            iban="DE89370400440532013000",
+            password=security.get_password_hash(PASSWORD),
+        )
+        db.add(db_user)
+        await db.commit()
+        await complaint.create_many(
+            db,
+            objs_in=[complaint_data(i) for i in range(max(PAGE_SIZES))],
+            user=db_user,
+        )
+        assert db_user.id is not None
+        first_refresh_token = await refresh_token.issue(db, user_id=db_user.id)
+    return engine, db_user, first_refresh_token
+
+
+def complaint_data(i: int) -> ComplaintCreate:
+    return ComplaintCreate(
+        title=f"Complaint {i}",
+        description="The parcel arrived damaged. " * 8,
+        photo_url=f"https://bucket.s3.amazonaws.com/{i}.png",
+        amount=Decimal("125.50"),
+    )
+
+
+def benchmarks(
+    engine: AsyncEngine, db_user: User, first_refresh_token: str
+) -> dict[str, Benchmark]:
+    def query_all(limit: int) -> Benchmark:
+        async def run() -> None:
+            async with AsyncSession(engine) as db:
+                await complaint.query(db).limit(limit).all()
+
+        return run
+
+    async def create() -> None:
+        async with AsyncSession(engine) as db:
+            await complaint.create(db, obj_in=complaint_data(0), user=db_user)
+
+    async def update() -> None:
+        async with AsyncSession(engine) as db:
+            db_complaint = await complaint.get(db, id=1)
+            assert db_complaint is not None
+            await complaint.update(
+                db,
+                db_obj=db_complaint,
+                obj_in=ComplaintUpdate(title="Updated complaint"),
+            )
+
+    current_refresh_token = first_refresh_token
+
+    async def rotate_refresh_token() -> None:
+        nonlocal current_refresh_token
+        async with AsyncSession(engine) as db:
+            _, current_refresh_token = await refresh_token.rotate(
+                db, refresh_token=current_refresh_token
+            )
+
+    rows = make_rows(max(PAGE_SIZES))
+    access_token = security.create_access_token(db_user.id)
+    hashed_password = security.get_password_hash(PASSWORD)
+    return {
+        **{f"query_all[{size}]": query_all(size) for size in PAGE_SIZES},
+        "crud_create": create,
+        "crud_update": update,
+        f"complaint_read_default[{len(rows)}]": lambda: default_path(rows),
+        f"complaint_read_rows[{len(rows)}]": lambda: fast_path(rows),
+        "verify_access_token": lambda: security.verify_access_token(
+            access_token
+        ),
+        "verify_password": lambda: security.verify_password(
+            PASSWORD, hashed_password
+        ),
+        "rotate_refresh_token": rotate_refresh_token,
+    }
+
+
+async def run_all(args: argparse.Namespace) -> dict[str, dict[str, float]]:
+    with tempfile.TemporaryDirectory() as workdir:
+        engine, db_user, first_refresh_token = await set_up(Path(workdir))
+        try:
+            results = {}
+            suite = benchmarks(engine, db_user, first_refresh_token)
+            for name, func in suite.items():
+                if args.filter and args.filter not in name:
+                    continue
+                results[name] = await measure(
+                    func, rounds=args.rounds, min_time=args.min_time
+                )
+                print(
+                    f"{name:>32}: {results[name]['min_us']:12.1f} us"
+                    f" (median {results[name]['median_us']:.1f} us)"
+                )
+            return results
+        finally:
+            await engine.dispose()
+
+
+def compare(
+    results: dict[str, dict[str, float]],
+    baseline: dict[str, dict[str, float]],
+    tolerance: float,
+) -> list[str]:
+    """Compare the fastest times per call against a baseline.
+
+    Args:
+        results: The current results.
+        baseline: The results to compare against.
+        tolerance: The relative slowdown that is still accepted.
+
+    Returns:
+        The names of the benchmarks that got slower than the tolerance allows.
+    """
+    print(
+        f"\n{'benchmark':>32} {'baseline':>12} {'current':>12} {'change':>8}"
+    )
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            print(f"{name:>32} {'-':>12} {result['min_us']:12.1f}")
+            continue
+        before = baseline[name]["min_us"]
+        change = result["min_us"] / before - 1
+        regressed = change > tolerance
+        if regressed:
+            regressions.append(name)
+        print(
+            f"{name:>32} {before:12.1f} {result['min_us']:12.1f}"
+            f" {change:+8.1%}{'  REGRESSION' if regressed else ''}"
+        )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument(
+        "--min-time",
+        type=float,
+        default=0.2,
+        help="the shortest duration of a round in seconds",
+    )
+    parser.add_argument("--filter", help="only run the matching benchmarks")
+    parser.add_argument("--output", type=Path, help="write the results here")
+    parser.add_argument(
+        "--baseline", type=Path, help="compare against these results"
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="the relative slowdown accepted before failing",
+    )
+    args = parser.parse_args()
+
+    results = asyncio.run(run_all(args))
+    if args.output is not None:
+        args.output.write_text(
+            json.dumps(
+                {
+                    "python": platform.python_version(),
+                    "machine": platform.machine(),
+                    "benchmarks": results,
+                },
+                indent=2,
+            )
+        )
+    if args.baseline is not None:
+        baseline = json.loads(args.baseline.read_text())["benchmarks"]
+        if compare(results, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Local stand-ins for Wise, S3 and SES with a configurable latency.
+
+The Wise stub answers the endpoints of ``WiseSDK``. The AWS stub answers the
+S3 and SES calls of the application on a single endpoint, the one
+``AWS_ENDPOINT_URL`` points to. It is started by ``benchmarks.load``, or on
+its own with::
+
+    python -m benchmarks.stubs --wise-port 8001 --aws-port 8002 --latency 0.05
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import uuid
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+SES_NAMESPACE = "http://ses.amazonaws.com/doc/2010-12-01/"
+
+
+def wise_app(latency: float) -> Starlette:
+    ids = itertools.count(1)
+
+    async def profiles(request: Request) -> JSONResponse:
+        await asyncio.sleep(latency)
+        return JSONResponse(
+            [{"id": 1, "type": "personal"}, {"id": 2, "type": "business"}]
+        )
+
+    async def quote(request: Request) -> JSONResponse:
+        await asyncio.sleep(latency)
+        return JSONResponse({"id": str(uuid.uuid4())})
+
+    async def created(request: Request) -> JSONResponse:
+        await asyncio.sleep(latency)
+        return JSONResponse({"id": next(ids)})
+
+    transfers: dict[str, dict[str, object]] = {}
+
+    async def transfer(request: Request) -> JSONResponse:
+        await asyncio.sleep(latency)
+        data = await request.json()
+        # like Wise, a repeated customer transaction id gets the first transfer
+        first = transfers.setdefault(
+            data["customerTransactionId"],
+            {
+                "id": next(ids),
+                "targetAccount": data["targetAccount"],
+                "quoteUuid": data["quoteUuid"],
+            },
+        )
+        return JSONResponse(first)
+
+    async def done(request: Request) -> JSONResponse:
+        await asyncio.sleep(latency)
+        return JSONResponse({"status": "COMPLETED"})
+
+    return Starlette(
+        routes=[
+            Route("/v1/profiles", profiles),
+            Route("/v3/profiles/{profile_id}/quotes", quote, methods=["POST"]),
+            Route("/v1/accounts", created, methods=["POST"]),
+            Route("/v1/transfers", transfer, methods=["POST"]),
+            Route("/v1/transfers/{transfer_id}/cancel", done, methods=["PUT"]),
+            Route(
+                "/v3/profiles/{profile_id}/transfers/{transfer_id}/payments",
+                done,
+                methods=["POST"],
+            ),
+        ]
+    )
+
+
+def _ses_response(action: str, result: str = "") -> Response:
+    body = (
+        f'<{action}Response xmlns="{SES_NAMESPACE}">'
+        f"<{action}Result>{result}</{action}Result>"
+        f"<ResponseMetadata><RequestId>{uuid.uuid4()}</RequestId>"
+        f"</ResponseMetadata></{action}Response>"
+    )
+    return Response(body, media_type="text/xml")
+
+
+def aws_app(latency: float) -> Starlette:
+    async def ses(request: Request) -> Response:
+        form = await request.form()
+        action = str(form["Action"])
+        if action == "SendBulkTemplatedEmail":
+            destinations = sum(
+                1
+                for key in form
+                if key.startswith("Destinations.member.")
+                and key.endswith(".Destination.ToAddresses.member.1")
+            )
+            members = "".join(
+                "<member><Status>Success</Status>"
+                f"<MessageId>{uuid.uuid4()}</MessageId></member>"
+                for _ in range(destinations)
+            )
+            return _ses_response(action, f"<Status>{members}</Status>")
+        if action == "GetSendQuota":
+            return _ses_response(
+                action,
+                "<Max24HourSend>50000</Max24HourSend>"
+                "<MaxSendRate>14</MaxSendRate>"
+                "<SentLast24Hours>0</SentLast24Hours>",
+            )
+        return _ses_response(action)
+
+    async def aws(request: Request) -> Response:
+        await asyncio.sleep(latency)
+        # SES speaks the query protocol, S3 REST
+        if request.method == "POST" and request.url.path == "/":
+            return await ses(request)
+        await request.body()
+        return Response(headers={"ETag": f'"{uuid.uuid4().hex}"'})
+
+    return Starlette(
+        routes=[
+            Route("/{path:path}", aws, methods=["GET", "HEAD", "PUT", "POST"])
+        ]
+    )
+
+
+async def serve(*, wise_port: int, aws_port: int, latency: float) -> None:
+    servers = [
+        uvicorn.Server(
+            uvicorn.Config(
+                app, host="127.0.0.1", port=port, log_level="warning"
+            )
+        )
+        for app, port in [
+            (wise_app(latency), wise_port),
+            (aws_app(latency), aws_port),
+        ]
+    ]
+    await asyncio.gather(*(server.serve() for server in servers))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--wise-port", type=int, default=8001)
+    parser.add_argument("--aws-port", type=int, default=8002)
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.05,
+        help="seconds every call to a stub takes",
+    )
+    args = parser.parse_args()
+    asyncio.run(
+        serve(
+            wise_port=args.wise_port,
+            aws_port=args.aws_port,
+            latency=args.latency,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
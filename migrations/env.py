@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import typing
 from logging.config import fileConfig
 
 from alembic import context
@@ -22,6 +23,34 @@ if config.config_file_name is not None:
 target_metadata = models.metadata
 
 config.set_main_option("sqlalchemy.url", settings.DATABASE_URL_WITHOUT_DRIVER)
+
+#: Tables that are managed by hand-written migrations and must be left alone
+#: by autogenerate.
+UNMANAGED_TABLE_PREFIXES = ("complaint_fts",)
+
+#: Columns that hand-written migrations add to the tables of the models, as
+#: pairs of table and column, like the generated full-text search column of
+#: Postgres.
+UNMANAGED_COLUMNS = {("complaint", "search_vector")}
+
+#: Indexes that hand-written migrations create.
+UNMANAGED_INDEXES = {"ix_complaint_search_vector"}
+
+
+def include_name(
+    name: str | None, type_: str, parent_names: dict[str, typing.Any]
+) -> bool:
+    if name is None:
+        return True
+    if type_ == "table":
+        return not name.startswith(UNMANAGED_TABLE_PREFIXES)
+    if type_ == "column":
+        return (parent_names["table_name"], name) not in UNMANAGED_COLUMNS
+    if type_ == "index":
+        return name not in UNMANAGED_INDEXES
+    return True
+
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -45,6 +74,7 @@ def run_migrations_offline() -> None:
         url=url,
         target_metadata=target_metadata,
         literal_binds=True,
+        include_name=include_name,
         dialect_opts={"paramstyle": "named"},
     )
 
@@ -73,6 +103,7 @@ def run_migrations_online() -> None:
             user_module_prefix="sqlmodel.sql.sqltypes.",
             render_as_batch=True,
             compare_type=True,
+            include_name=include_name,
         )
 
         with context.begin_transaction():
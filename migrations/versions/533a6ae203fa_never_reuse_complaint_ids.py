@@ -0,0 +1,85 @@
+"""never reuse complaint ids
+
+Revision ID: 533a6ae203fa
+Revises: bff0cd4ff225
+Create Date: 2026-10-19 00:12:41.208317
+
+Archived complaints and transactions keep their ids. SQLite hands out the
+highest id again once its row is deleted, unless the table is declared with
+``AUTOINCREMENT``, so the ``complaint`` and ``transaction`` tables are
+recreated with it. The ids already archived are marked as used. PostgreSQL
+sequences never hand out an id twice.
+
+"""
+from __future__ import annotations
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "533a6ae203fa"
+down_revision = "bff0cd4ff225"
+branch_labels = None
+depends_on = None
+
+#: The tables whose rows are archived, along with their archives
+TABLES = [
+    ("complaint", "complaintarchive"),
+    ("transaction", "transactionarchive"),
+]
+
+#: The full-text search triggers, which SQLite drops along with the table
+FTS_TRIGGERS = [
+    """
+    CREATE TRIGGER complaint_fts_ai AFTER INSERT ON complaint BEGIN
+        INSERT INTO complaint_fts (rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER complaint_fts_ad AFTER DELETE ON complaint BEGIN
+        INSERT INTO complaint_fts (complaint_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER complaint_fts_au AFTER UPDATE OF title, description
+    ON complaint BEGIN
+        INSERT INTO complaint_fts (complaint_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO complaint_fts (rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+]
+
+
+def _recreate(*, autoincrement: bool) -> None:
+    for table, archive in TABLES:
+        with op.batch_alter_table(
+            table,
+            recreate="always",
+            table_kwargs={"sqlite_autoincrement": autoincrement},
+        ):
+            pass
+        if autoincrement:
+            op.execute(f"DELETE FROM sqlite_sequence WHERE name = '{table}'")
+            op.execute(
+                f"""
+                INSERT INTO sqlite_sequence (name, seq)
+                SELECT '{table}', coalesce(max(id), 0) FROM (
+                    SELECT id FROM "{table}" UNION ALL SELECT id FROM {archive}
+                )
+                """
+            )
+    for statement in FTS_TRIGGERS:
+        op.execute(statement)
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == "sqlite":
+        _recreate(autoincrement=True)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "sqlite":
+        _recreate(autoincrement=False)
@@ -0,0 +1,99 @@
+"""complaint full text search
+
+Revision ID: bb823766df29
+Revises: b905ff35bff8
+Create Date: 2026-10-18 22:45:57.777828
+
+The search index lives outside of the SQLModel metadata. On SQLite it is an
+external content FTS5 table kept in sync by triggers, on PostgreSQL it is a
+generated ``tsvector`` column with a GIN index.
+
+NOTE: SQLite drops the triggers whenever a batch migration recreates the
+``complaint`` table, so such migrations must recreate them.
+
+"""
+from __future__ import annotations
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "bb823766df29"
+down_revision = "b905ff35bff8"
+branch_labels = None
+depends_on = None
+
+SQLITE_UPGRADE = [
+    """
+    CREATE VIRTUAL TABLE complaint_fts USING fts5(
+        title, description, content='complaint', content_rowid='id'
+    )
+    """,
+    """
+    CREATE TRIGGER complaint_fts_ai AFTER INSERT ON complaint BEGIN
+        INSERT INTO complaint_fts (rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER complaint_fts_ad AFTER DELETE ON complaint BEGIN
+        INSERT INTO complaint_fts (complaint_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER complaint_fts_au AFTER UPDATE OF title, description
+    ON complaint BEGIN
+        INSERT INTO complaint_fts (complaint_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO complaint_fts (rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+    "INSERT INTO complaint_fts (complaint_fts) VALUES ('rebuild')",
+]
+
+SQLITE_DOWNGRADE = [
+    "DROP TRIGGER complaint_fts_au",
+    "DROP TRIGGER complaint_fts_ad",
+    "DROP TRIGGER complaint_fts_ai",
+    "DROP TABLE complaint_fts",
+]
+
+POSTGRESQL_UPGRADE = [
+    """
+    ALTER TABLE complaint ADD COLUMN search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', title), 'A')
+        || setweight(to_tsvector('english', description), 'B')
+    ) STORED
+    """,
+    """
+    CREATE INDEX ix_complaint_search_vector ON complaint
+    USING gin (search_vector)
+    """,
+]
+
+POSTGRESQL_DOWNGRADE = [
+    "DROP INDEX ix_complaint_search_vector",
+    "ALTER TABLE complaint DROP COLUMN search_vector",
+]
+
+
+def upgrade() -> None:
+    statements = (
+        POSTGRESQL_UPGRADE
+        if op.get_bind().dialect.name == "postgresql"
+        else SQLITE_UPGRADE
+    )
+    for statement in statements:
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    statements = (
+        POSTGRESQL_DOWNGRADE
+        if op.get_bind().dialect.name == "postgresql"
+        else SQLITE_DOWNGRADE
+    )
+    for statement in statements:
+        op.execute(statement)
@@ -1,7 +1,14 @@
 from __future__ import annotations
 
+import csv
+import itertools
+import json
 import sys
+import time
 import typing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
 
 import asyncclick as click
 from tenacity import RetryError, retry, stop_after_attempt, wait_fixed
@@ -11,6 +18,8 @@ from . import main
 if typing.TYPE_CHECKING:
     from pydantic import EmailStr
 
+    from .models.user import UserCreate
+
 
 @click.group()
 async def cli() -> None:
@@ -57,11 +66,234 @@ async def create_admin(
         password=password,
     )
     async for db in get_db():
-        # PERF: we can improve this by directly creating the user with
-        # the role.
-        db_user = await user.create(db, obj_in=user_in)
-        assert db_user.id is not None
-        await user.change_role_by_id(db, id=db_user.id, role=Role.ADMIN)
+        await user.create_many(db, objs_in=[user_in], role=Role.ADMIN)
+
+
+def _read_users(path: Path, file_format: str) -> typing.Iterator[UserCreate]:
+    from pydantic import ValidationError
+
+    from .models.user import UserCreate
+
+    with path.open(newline="") as f:
+        if file_format == "csv":
+            rows: typing.Iterable[dict] = csv.DictReader(f)
+        else:
+            rows = (json.loads(line) for line in f if line.strip())
+        for number, row in enumerate(rows, start=1):
+            try:
+                yield UserCreate(**row)
+            except ValidationError as e:
+                msg = f"invalid user in record {number}: {e}"
+                raise click.ClickException(msg) from e
+
+
+@cli.command()
+@click.argument(
+    "path", type=click.Path(exists=True, dir_okay=False, path_type=Path)
+)
+@click.option(
+    "-f",
+    "--format",
+    "file_format",
+    type=click.Choice(["csv", "ndjson"]),
+    help="Format of the file. Guessed from the file extension by default.",
+)
+@click.option(
+    "-r",
+    "--role",
+    type=click.Choice(["complainer", "approver", "admin"]),
+    default="complainer",
+    show_default=True,
+)
+@click.option("-b", "--batch-size", type=int, default=500, show_default=True)
+@click.option(
+    "-w",
+    "--workers",
+    type=int,
+    help="Processes used to hash passwords. Defaults to the CPU count.",
+)
+async def import_users(
+    path: Path,
+    file_format: str | None,
+    role: str,
+    batch_size: int,
+    workers: int | None,
+) -> None:
+    """Import users from a CSV or NDJSON file.
+
+    Every record must have the fields of the registration form. The file is
+    streamed and the users are inserted in batches.
+    """
+    from sqlmodel.ext.asyncio.session import AsyncSession
+
+    from .crud import user
+    from .database import engine
+    from .exc import NotUniqueError
+    from .models.enums import Role
+
+    if file_format is None:
+        file_format = "csv" if path.suffix.lower() == ".csv" else "ndjson"
+
+    users = _read_users(path, file_format)
+    total = 0
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        async with AsyncSession(engine) as db:
+            while batch := list(itertools.islice(users, batch_size)):
+                try:
+                    total += await user.create_many(
+                        db, objs_in=batch, role=Role(role), executor=executor
+                    )
+                except NotUniqueError as e:
+                    msg = (
+                        f"a user after the first {total} already exists, "
+                        "its batch was not imported"
+                    )
+                    raise click.ClickException(msg) from e
+                rate = total / (time.perf_counter() - start)
+                click.echo(f"Imported {total} users ({rate:.1f} users/s)")
+
+    elapsed = time.perf_counter() - start
+    click.secho(
+        f"Imported {total} users in {elapsed:.1f}s "
+        f"({total / elapsed:.1f} users/s)",
+        fg="green",
+    )
+
+
+@cli.command()
+async def refresh_stats() -> None:
+    """Recompute the complaint statistics from scratch.
+
+    The statistics are maintained incrementally, so this is only needed to
+    repair them, for example from a periodic job.
+    """
+    from .crud import complaint_stats
+    from .database import get_db
+
+    async for db in get_db():
+        await complaint_stats.refresh(db)
+
+    click.secho("Complaint statistics refreshed", fg="green")
+
+
+@cli.command()
+@click.option(
+    "-d", "--older-than-days", type=int, default=90, show_default=True
+)
+@click.option("-b", "--batch-size", type=int, default=1000, show_default=True)
+async def archive_complaints(older_than_days: int, batch_size: int) -> None:
+    """Move closed complaints older than the given age to the archive.
+
+    The complaints are moved in batches, each in its own transaction.
+    """
+    from .crud import archive
+    from .database import get_db
+
+    created_before = datetime.utcnow() - timedelta(days=older_than_days)
+    total = 0
+    async for db in get_db():
+        while moved := await archive.archive_closed_complaints(
+            db, created_before=created_before, batch_size=batch_size
+        ):
+            total += moved
+            click.echo(f"Archived {total} complaints so far")
+
+    click.secho(f"Archived {total} complaints", fg="green")
+
+
+@cli.command()
+async def purge_idempotency_keys() -> None:
+    """Delete the idempotency keys that have expired.
+
+    Expired keys are not replayed anyway, this only keeps the table small,
+    for example from a periodic job.
+    """
+    from .core import settings
+    from .crud import idempotency_key
+    from .database import get_db
+
+    created_before = datetime.utcnow() - timedelta(
+        hours=settings.IDEMPOTENCY_KEY_TTL_HOURS
+    )
+    async for db in get_db():
+        deleted = await idempotency_key.purge(
+            db, created_before=created_before
+        )
+
+    click.secho(f"Deleted {deleted} idempotency keys", fg="green")
+
+
+@cli.command()
+async def purge_refresh_tokens() -> None:
+    """Delete the refresh tokens that have expired.
+
+    Expired tokens are rejected anyway, this only keeps the table small, for
+    example from a periodic job.
+    """
+    from .crud import refresh_token
+    from .database import get_db
+
+    async for db in get_db():
+        deleted = await refresh_token.purge(
+            db, expired_before=datetime.utcnow()
+        )
+
+    click.secho(f"Deleted {deleted} refresh tokens", fg="green")
+
+
+@cli.command()
+@click.option(
+    "-c",
+    "--concurrency",
+    type=int,
+    help="Jobs run at the same time. Defaults to JOB_WORKER_CONCURRENCY.",
+)
+@click.option("--burst", is_flag=True, help="Exit once no job is due.")
+async def worker(concurrency: int | None, burst: bool) -> None:
+    """Run the queued background jobs, like issuing the Wise transfers.
+
+    On SIGINT or SIGTERM the running jobs are finished before exiting.
+    """
+    import asyncio
+    import logging
+    import signal
+
+    from . import tracing
+    from .core import settings
+    from .services.container import open_services
+    from .worker import Worker
+
+    logging.basicConfig(level=logging.INFO)
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stop.set)
+
+    tracer_provider = tracing.configure()
+    async with open_services() as services:
+        pool = Worker(
+            services=services,
+            concurrency=concurrency or settings.JOB_WORKER_CONCURRENCY,
+            poll_interval=settings.JOB_POLL_INTERVAL_SECONDS,
+            lease=timedelta(seconds=settings.JOB_LEASE_SECONDS),
+        )
+        click.echo(f"Running jobs with a concurrency of {pool.concurrency}")
+        await pool.run(stop=stop, burst=burst)
+    if tracer_provider is not None:
+        tracer_provider.shutdown()
+    click.secho("Worker stopped", fg="green")
+
+
+@cli.command()
+async def sync_email_templates() -> None:
+    """Create or update the email templates in SES."""
+    from .services.container import open_services
+
+    async with open_services() as services:
+        await services.ses.sync_templates()
+
+    click.secho("Email templates are up to date", fg="green")
 
 
 @cli.command()
@@ -70,15 +302,29 @@ async def create_admin(
 async def pre_start(max_tries: int, wait_seconds: int) -> None:
     """Check if all services are functional.
 
-    If not functional, retry.
+    The services are checked at the same time, each for at most
+    HEALTH_CHECK_TIMEOUT_SECONDS. If not functional, retry.
     """
+    from .health import HealthStatus
 
     @retry(
         stop=stop_after_attempt(max_tries),
         wait=wait_fixed(wait_seconds),
     )
     async def retrier() -> None:
-        await main.check_services()
+        report = await main.check_services()
+        for dependency in report.dependencies:
+            latency = f"{dependency.latency_seconds * 1000:.0f} ms"
+            if dependency.healthy:
+                click.secho(f"{dependency.name}: ok ({latency})", fg="green")
+            else:
+                click.secho(
+                    f"{dependency.name}: {dependency.error} ({latency})",
+                    fg="red",
+                )
+        if report.status is not HealthStatus.OK:
+            msg = f"services are {report.status.value}"
+            raise RuntimeError(msg)
 
     try:
         await retrier()
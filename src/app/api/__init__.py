@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from fastapi import APIRouter
 
-from . import auth, complaint, user
+from . import auth, complaint, health, user
 
 router = APIRouter()
 
@@ -11,3 +11,4 @@ router.include_router(user.router, prefix="/users", tags=["users"])
 router.include_router(
     complaint.router, prefix="/complaints", tags=["complaints"]
 )
+router.include_router(health.router, prefix="/health", tags=["health"])
@@ -6,9 +6,11 @@ from pydantic import EmailStr
 from typing_extensions import Annotated
 
 from ..core import security
+from ..crud import refresh_token as refresh_token_crud
 from ..crud import user
 from ..database import Database
-from ..models.token import Token
+from ..exc import InvalidRefreshTokenError
+from ..models.token import RefreshRequest, Token
 
 router = APIRouter()
 
@@ -30,7 +32,43 @@ async def login_for_token(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    assert db_user.id is not None
     return Token(
         access_token=security.create_access_token(db_user.id),
         token_type="Bearer",
+        refresh_token=await refresh_token_crud.issue(db, user_id=db_user.id),
     )
+
+
+@router.post("/refresh")
+async def refresh_access_token(
+    db: Database,
+    refresh_in: RefreshRequest,
+) -> Token:
+    # the password is not verified again, so this is much cheaper than a login
+    try:
+        user_id, refresh_token = await refresh_token_crud.rotate(
+            db, refresh_token=refresh_in.refresh_token
+        )
+    except InvalidRefreshTokenError as e:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid refresh token",
+            headers={"WWW-Authenticate": "Bearer"},
+        ) from e
+
+    return Token(
+        access_token=security.create_access_token(user_id),
+        token_type="Bearer",
+        refresh_token=refresh_token,
+    )
+
+
+@router.post(
+    "/logout",
+    status_code=status.HTTP_204_NO_CONTENT,
+    response_model=None,
+)
+async def logout(db: Database, refresh_in: RefreshRequest) -> None:
+    # access tokens are not stored, they stay valid until they expire
+    await refresh_token_crud.revoke(db, refresh_token=refresh_in.refresh_token)
@@ -1,7 +1,10 @@
 from __future__ import annotations
 
+import asyncio
 import typing
 import uuid
+from datetime import datetime  # noqa: TC003
+from decimal import Decimal  # noqa: TC003
 from pathlib import Path
 
 from fastapi import (
@@ -9,6 +12,7 @@ from fastapi import (
     Depends,
     HTTPException,
     Query,
+    Response,
     UploadFile,
     status,
 )
@@ -21,27 +25,41 @@ from ..api.deps import (
     get_current_approver,
     get_current_user,
 )
-from ..crud import complaint, transaction, user
+from ..crud import complaint, complaint_stats, ingestion_job, transaction, user
 from ..database import Database
 from ..exc import DoesNotExistError
 from ..models.complaint import (
     Complaint,
+    ComplaintBatchCreate,
     ComplaintCreate,
     ComplaintCreateUser,
+    ComplaintPhotoRead,
     ComplaintRead,
+    ComplaintReadWithUser,
 )
 from ..models.enums import ComplaintStatus, Role
-from ..models.transaction import TransactionCreate
+from ..models.ingestion import (
+    IngestionJob,
+    IngestionJobCreate,
+    IngestionJobRead,
+)
+from ..models.stats import ComplaintStats, ComplaintStatsRead
 from ..models.user import User  # noqa: TC002
-from ..services.s3 import S3Service, get_s3
-from ..services.ses import SESService, get_ses
-from ..services.wise import WiseService, get_wise
+from ..services.container import get_s3, get_ses, get_wise
+from ..services.s3 import S3Service, upload_key
+from ..services.ses import SESService
+from ..services.wise import WiseService
+from .responses import rows_response
 
 if typing.TYPE_CHECKING:
     from pydantic import HttpUrl
+    from sqlmodel.ext.asyncio.session import AsyncSession
 
 router = APIRouter()
 
+#: The content types of the photos of complaints
+PHOTO_CONTENT_TYPES = ["image/jpeg", "image/png"]
+
 CurrentUser = Annotated[User, Depends(get_current_user)]
 SESClient = Annotated[SESService, Depends(get_ses)]
 WiseClient = Annotated[WiseService, Depends(get_wise)]
@@ -50,18 +68,82 @@ S3Client = Annotated[S3Service, Depends(get_s3)]
 
 @router.get("/", response_model=list[ComplaintRead])
 async def get_complaints(
-    limit: Annotated[int, Query(100, ge=0, le=100)],
-    skip: Annotated[int, Query(0, ge=0)],
     db: Database,
     db_user: CurrentUser,
+    limit: Annotated[int, Query(ge=0, le=100)] = 100,
+    skip: Annotated[int, Query(ge=0)] = 0,
+    complaint_status: ComplaintStatus | None = None,
+    created_after: datetime | None = None,
+    created_before: datetime | None = None,
+    min_amount: Annotated[Decimal | None, Query(ge=0)] = None,
+    max_amount: Annotated[Decimal | None, Query(ge=0)] = None,
+    include_archived: bool = False,
+) -> Response:
+    query = (
+        complaint.query(db, include_archived=include_archived)
+        .project(ComplaintRead)
+        .filter_by_created_at(after=created_after, before=created_before)
+        .filter_by_amount(minimum=min_amount, maximum=max_amount)
+        .limit(limit)
+        .skip(skip)
+    )
+    if complaint_status is not None:
+        query = query.filter_by_status(complaint_status)
+    if db_user.role not in [Role.APPROVER, Role.ADMIN]:
+        query = query.filter_by_user(db_user)
+    return rows_response(ComplaintRead, await query.rows())
+
+
+@router.get("/search", response_model=list[ComplaintRead])
+async def search_complaints(
+    # at least one term, a blank query is a syntax error of the index
+    q: Annotated[str, Query(max_length=200, pattern=r"^\s*\S")],
+    db: Database,
+    db_user: CurrentUser,
+    limit: Annotated[int, Query(ge=0, le=100)] = 100,
+    offset: Annotated[int, Query(ge=0)] = 0,
+    complaint_status: ComplaintStatus | None = None,
+) -> Response:
+    query = (
+        complaint.query(db)
+        .project(ComplaintRead)
+        .search(q)
+        .limit(limit)
+        .offset(offset)
+    )
+    if complaint_status is not None:
+        query = query.filter_by_status(complaint_status)
+    if db_user.role not in [Role.APPROVER, Role.ADMIN]:
+        query = query.filter_by_user(db_user)
+    return rows_response(ComplaintRead, await query.rows())
+
+
+@router.get("/with-user", response_model=list[ComplaintReadWithUser])
+async def get_complaints_with_user(
+    db: Database,
+    db_user: CurrentUser,
+    limit: Annotated[int, Query(ge=0, le=100)] = 100,
+    skip: Annotated[int, Query(ge=0)] = 0,
     complaint_status: ComplaintStatus | None = None,
 ) -> list[Complaint]:
-    query = complaint.query(db).limit(limit).skip(skip)
+    query = complaint.query(db).with_user().limit(limit).skip(skip)
     if complaint_status is not None:
         query = query.filter_by_status(complaint_status)
-    if db_user.role in [Role.APPROVER, Role.ADMIN]:
-        return await query.all()
-    return await query.filter_by_user(db_user).all()
+    if db_user.role not in [Role.APPROVER, Role.ADMIN]:
+        query = query.filter_by_user(db_user)
+    return await query.all()
+
+
+@router.get(
+    "/stats",
+    response_model=list[ComplaintStatsRead],
+    dependencies=[Depends(get_current_admin)],
+)
+async def get_complaint_stats(
+    db: Database,
+    user_id: int | None = None,
+) -> list[ComplaintStats]:
+    return await complaint_stats.get_multi(db, user_id=user_id)
 
 
 @router.post(
@@ -74,23 +156,13 @@ async def create_complaint(
     db: Database,
     db_user: CurrentUser,
     s3_client: S3Client,
-    wise_client: WiseClient,
     complaint_in: Annotated[
         ComplaintCreateUser, FormDepends(ComplaintCreateUser)
     ],
 ) -> Complaint:
-    # check if uploaded file is valid
-    assert photo.filename is not None
-    if photo.content_type not in ["image/jpeg", "image/png"]:
-        raise HTTPException(
-            detail=f"Invalid file type: {photo.content_type}",
-            status_code=status.HTTP_400_BAD_REQUEST,
-        )
-
     # generate filename, upload photo and generate photo url
-    extension = Path(photo.filename).suffix
-    filename = f"{uuid.uuid4()}{extension}"
-    await s3_client.upload_fileobj(photo.file, filename, photo.content_type)
+    filename, content_type = _photo_name(photo)
+    await s3_client.upload_fileobj(photo.file, filename, content_type)
     photo_url = typing.cast("HttpUrl", s3_client.get_object_url(filename))
 
     # store the generated url in the database
@@ -98,26 +170,128 @@ async def create_complaint(
         **complaint_in.dict(),
         photo_url=photo_url,
     )
-    db_complaint = await complaint.create(
-        db, obj_in=complaint_data, user=db_user
+    # the transfer is issued in the background, see its transfer_status
+    return await complaint.create(db, obj_in=complaint_data, user=db_user)
+
+
+@router.post(
+    "/photos",
+    response_model=ComplaintPhotoRead,
+    status_code=status.HTTP_201_CREATED,
+)
+async def upload_complaint_photo(
+    photo: UploadFile,
+    db_user: CurrentUser,
+    s3_client: S3Client,
+) -> ComplaintPhotoRead:
+    assert db_user.id is not None
+    name, content_type = _photo_name(photo)
+    await s3_client.upload_fileobj(
+        photo.file, upload_key(db_user.id, name), content_type
+    )
+    return ComplaintPhotoRead(photo_key=name)
+
+
+@router.post(
+    "/batch",
+    response_model=IngestionJobRead,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def create_complaint_batch(
+    batch_in: ComplaintBatchCreate,
+    db: Database,
+    db_user: CurrentUser,
+    s3_client: S3Client,
+) -> IngestionJob:
+    assert db_user.id is not None
+    # the photos must have been uploaded by the user with the photo endpoint
+    keys = {
+        complaint_in.photo_key: upload_key(db_user.id, complaint_in.photo_key)
+        for complaint_in in batch_in.complaints
+    }
+    content_types = await asyncio.gather(
+        *(s3_client.get_content_type(key) for key in keys.values())
+    )
+    for photo_key, content_type in zip(keys, content_types):
+        if content_type is None:
+            raise HTTPException(
+                detail=f"Photo {photo_key} has not been uploaded",
+                status_code=status.HTTP_400_BAD_REQUEST,
+            )
+        _check_photo_type(content_type)
+
+    complaints_in = [
+        ComplaintCreate(
+            **complaint_in.dict(exclude={"photo_key"}),
+            photo_url=s3_client.get_object_url(keys[complaint_in.photo_key]),
+        )
+        for complaint_in in batch_in.complaints
+    ]
+    # the job is committed along with its complaints
+    job_in = IngestionJobCreate(total=len(complaints_in), user_id=db_user.id)
+    db_job = await ingestion_job.stage(db, obj_in=job_in)
+
+    # the transfers are issued in the background, the job reports their
+    # progress
+    assert db_job.id is not None
+    await complaint.create_many(
+        db, objs_in=complaints_in, user=db_user, ingestion_job_id=db_job.id
     )
-    await db.refresh(db_user)
-
-    # create a transaction
-    assert db_user.iban is not None
-    wise_transaction = await wise_client.issue_transaction(
-        f"{db_user.first_name} {db_user.last_name}",
-        db_user.iban,
-        db_complaint.amount,
+    await db.refresh(db_job)
+    return db_job
+
+
+@router.get("/batch/{job_id}", response_model=IngestionJobRead)
+async def get_complaint_batch(
+    job_id: int,
+    db: Database,
+    db_user: CurrentUser,
+) -> IngestionJob:
+    db_job = await ingestion_job.get(db, id=job_id)
+    if db_job is None or (
+        db_job.user_id != db_user.id and db_user.role != Role.ADMIN
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job does not exist",
+        )
+    return db_job
+
+
+def _check_photo_type(content_type: str | None) -> str:
+    if content_type is None or content_type not in PHOTO_CONTENT_TYPES:
+        raise HTTPException(
+            detail=f"Invalid file type: {content_type}",
+            status_code=status.HTTP_400_BAD_REQUEST,
+        )
+    return content_type
+
+
+def _photo_name(photo: UploadFile) -> tuple[str, str]:
+    # check if uploaded file is valid, returns a new name and the type
+    assert photo.filename is not None
+    content_type = _check_photo_type(photo.content_type)
+    extension = Path(photo.filename).suffix
+    return f"{uuid.uuid4()}{extension}", content_type
+
+
+async def _get_transfer_id(db: AsyncSession, complaint_id: int) -> int:
+    db_transaction = (
+        await transaction.query(db)
+        .filter_by_complaint_id(complaint_id)
+        .one_or_none()
     )
-    assert db_complaint.id is not None
-    transaction_in = TransactionCreate(
-        **wise_transaction.dict(),
-        complaint_id=db_complaint.id,
+    if db_transaction is not None:
+        return db_transaction.transfer_id
+    if await complaint.get(db, id=complaint_id) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Complaint does not exist",
+        )
+    raise HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="The transfer of the complaint has not been issued yet",
     )
-    await transaction.create(db, obj_in=transaction_in)
-    await db.refresh(db_complaint)
-    return db_complaint
 
 
 @router.delete(
@@ -147,6 +321,8 @@ async def approve_complaint(
     ses_client: SESClient,
     wise_client: WiseClient,
 ) -> Complaint:
+    # the transfer is issued in the background after the complaint is created
+    transfer_id = await _get_transfer_id(db, complaint_id)
     try:
         db_complaint = await complaint.change_status_by_id(
             db,
@@ -159,15 +335,9 @@ async def approve_complaint(
             detail="Complaint does not exist",
         ) from e
 
-    # fund the transfer created in create_complaint
-    assert db_complaint.id is not None
-    db_transaction = (
-        await transaction.query(db)
-        .filter_by_complaint_id(db_complaint.id)
-        .one()
-    )
+    # fund the transfer issued for the complaint
     try:
-        await wise_client.fund_transfer(db_transaction.transfer_id)
+        await wise_client.fund_transfer(transfer_id)
     except exc.FailedTransactionError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -178,8 +348,8 @@ async def approve_complaint(
     db_user = await user.get(db, id=db_complaint.complainer_id)
     assert db_user is not None  # TODO: what if user is deleted?
     assert db_user.email is not None
-    await ses_client.send_email(
-        "Complaint approved!", "Your claim has been approved!", [db_user.email]
+    await ses_client.send_templated_email(
+        "ComplaintDecision", db_user.email, {"decision": "approved"}
     )
 
     return db_complaint
@@ -196,6 +366,8 @@ async def reject_complaint(
     ses_client: SESClient,
     wise_client: WiseClient,
 ) -> Complaint:
+    # the transfer is issued in the background after the complaint is created
+    transfer_id = await _get_transfer_id(db, complaint_id)
     try:
         db_complaint = await complaint.change_status_by_id(
             db,
@@ -208,15 +380,8 @@ async def reject_complaint(
             detail="Complaint does not exist",
         ) from e
 
-    assert db_complaint.id is not None
-    db_transaction = (
-        await transaction.query(db)
-        .filter_by_complaint_id(db_complaint.id)
-        .one()
-    )
-
     try:
-        await wise_client.cancel_transfer(db_transaction.transfer_id)
+        await wise_client.cancel_transfer(transfer_id)
     except exc.CancelledTransactionError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -226,8 +391,8 @@ async def reject_complaint(
     db_user = await user.get(db, id=db_complaint.complainer_id)
     assert db_user is not None  # TODO: what if user is deleted?
     assert db_user.email is not None
-    await ses_client.send_email(
-        "Complaint rejected!", "Your claim has been rejected!", [db_user.email]
+    await ses_client.send_templated_email(
+        "ComplaintDecision", db_user.email, {"decision": "rejected"}
     )
 
     return db_complaint
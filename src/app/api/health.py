@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import typing
+
+from fastapi import APIRouter, Depends, Request, Response, status
+
+from ..api.deps import get_current_admin
+from ..health import HealthMonitor, HealthReport, HealthStatus
+from ..services.resilience import GuardStats, guards
+
+router = APIRouter()
+
+
+@router.get("/live")
+async def get_liveness() -> dict[str, str]:
+    """Report that the process is serving requests.
+
+    No dependency is checked, so a failing backend does not get the process
+    restarted.
+    """
+    return {"status": "ok"}
+
+
+@router.get(
+    "/ready",
+    response_model=HealthReport,
+    responses={status.HTTP_503_SERVICE_UNAVAILABLE: {"model": HealthReport}},
+)
+async def get_readiness(request: Request, response: Response) -> HealthReport:
+    """Report the health and latency of every dependency.
+
+    The report is cached for ``HEALTH_CACHE_SECONDS``. The status code is
+    ``503`` only if a dependency no request can do without, the database,
+    is unhealthy: while an external service is down the other requests can
+    still be served.
+    """
+    monitor = typing.cast("HealthMonitor", request.app.state.health)
+    report = await monitor.report()
+    if report.status is HealthStatus.UNAVAILABLE:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return report
+
+
+@router.get(
+    "/services",
+    response_model=list[GuardStats],
+    dependencies=[Depends(get_current_admin)],
+)
+async def get_service_stats() -> list[GuardStats]:
+    """Report the circuit state and load of every external service."""
+    return [guard.stats() for guard in guards.values()]
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from pydantic import EmailStr  # noqa: TC002
 from starlette import status
 from typing_extensions import Annotated
@@ -10,7 +10,14 @@ from ..crud import user
 from ..database import Database
 from ..exc import DoesNotExistError, NotUniqueError
 from ..models.enums import Role
-from ..models.user import User, UserCreate, UserRead, UserUpdate
+from ..models.user import (
+    User,
+    UserCreate,
+    UserRead,
+    UserReadWithComplaints,
+    UserUpdate,
+)
+from .responses import rows_response
 
 router = APIRouter()
 
@@ -24,14 +31,29 @@ CurrentUser = Annotated[User, Depends(get_current_user)]
 )
 async def get_users(
     db: Database,
-    skip: Annotated[int, Query(0, ge=0)],
-    limit: Annotated[int, Query(100, ge=0, le=100)],
+    skip: Annotated[int, Query(ge=0)] = 0,
+    limit: Annotated[int, Query(ge=0, le=100)] = 100,
     email: EmailStr | None = None,
-) -> list[User]:
+) -> Response:
+    query = user.query(db).project(UserRead)
     if email is None:
-        return await user.query(db).limit(limit).skip(skip).all()
-    db_user = await user.query(db).filter_by_email(email).one_or_none()
-    return [db_user] if db_user else []
+        query = query.limit(limit).skip(skip)
+    else:
+        query = query.filter_by_email(email)
+    return rows_response(UserRead, await query.rows())
+
+
+@router.get(
+    "/with-complaints",
+    response_model=list[UserReadWithComplaints],
+    dependencies=[Depends(get_current_admin)],
+)
+async def get_users_with_complaints(
+    db: Database,
+    skip: Annotated[int, Query(ge=0)] = 0,
+    limit: Annotated[int, Query(ge=0, le=100)] = 100,
+) -> list[User]:
+    return await user.query(db).with_complaints().limit(limit).skip(skip).all()
 
 
 @router.patch("/", response_model=UserRead)
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import hashlib
+import secrets
 import typing
 from datetime import datetime, timedelta
 
@@ -61,6 +63,51 @@ def verify_access_token(access_token: str) -> token.TokenPayload:
         raise ValueError(msg) from e
 
 
+def create_refresh_token() -> str:
+    """Generate a random refresh token.
+
+    Returns:
+        A token as a string.
+    """
+    return secrets.token_urlsafe(32)
+
+
+def hash_refresh_token(refresh_token: str) -> str:
+    """Hash a refresh token to store or look it up.
+
+    The tokens are random and long, so, unlike passwords, they need a fast
+    hash rather than a slow one.
+
+    Args:
+        refresh_token: The refresh token as a string.
+
+    Returns:
+        The hex digest of the token.
+    """
+    return hashlib.sha256(refresh_token.encode()).hexdigest()
+
+
+def bearer_token_subject(authorization: str) -> int | None:
+    """Get the subject of the access token in an ``Authorization`` header.
+
+    Only the token is validated, its user may not exist anymore.
+
+    Args:
+        authorization: The value of the header.
+
+    Returns:
+        The id of the user, or ``None`` if the header does not hold a valid
+        bearer token.
+    """
+    scheme, _, access_token = authorization.partition(" ")
+    if scheme.lower() != "bearer":
+        return None
+    try:
+        return verify_access_token(access_token).sub
+    except ValueError:
+        return None
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify password against a given hash.
 
@@ -20,6 +20,10 @@ class Settings(BaseSettings):
     #: application
     AWS_BUCKET_NAME: str = Field(default=...)
 
+    #: Talk to this endpoint instead of AWS, for example to a local moto
+    #: server.
+    AWS_ENDPOINT_URL: str | None = None
+
     #: the AWS region to be used for SES.
     AWS_SES_REGION_NAME: str = Field(default=...)
 
@@ -32,6 +36,134 @@ class Settings(BaseSettings):
     #: Wise API token
     WISE_TOKEN: str = Field(default=...)
 
+    #: The number of threads for the calls to Wise.
+    WISE_MAX_CONCURRENCY: int = 8
+
+    #: The number of threads for the calls to S3, mostly photo uploads.
+    S3_MAX_CONCURRENCY: int = 16
+
+    #: The number of threads for the calls to SES.
+    SES_MAX_CONCURRENCY: int = 4
+
+    #: The number of seconds a call waits for its service to be free.
+    SERVICE_QUEUE_TIMEOUT_SECONDS: float = 5.0
+
+    #: The number of emails SES may send per second.
+    SES_MAX_SEND_RATE: float = 14.0
+
+    #: The number of seconds emails are collected before they are sent in
+    #: bulk.
+    SES_BATCH_WINDOW_SECONDS: float = 1.0
+
+    #: The timeout for connecting to an external service.
+    SERVICE_CONNECT_TIMEOUT_SECONDS: float = 3.0
+
+    #: The timeout for reading the response of an external service.
+    SERVICE_READ_TIMEOUT_SECONDS: float = 20.0
+
+    #: The number of consecutive failures after which a service is not
+    #: called anymore.
+    SERVICE_FAILURE_THRESHOLD: int = 5
+
+    #: The number of seconds after which a failing service is called again.
+    SERVICE_RESET_TIMEOUT_SECONDS: float = 30.0
+
+    #: The number of seconds a dependency has to pass its health check.
+    HEALTH_CHECK_TIMEOUT_SECONDS: float = 3.0
+
+    #: The number of seconds the result of the health checks is reused for.
+    HEALTH_CACHE_SECONDS: float = 5.0
+
+    #: The number of seconds after which a query is logged as slow.
+    SLOW_QUERY_THRESHOLD_SECONDS: float = 0.5
+
+    #: The number of times a request may run the same statement before it is
+    #: logged as a possible N+1 query.
+    QUERY_REPEAT_THRESHOLD: int = 5
+
+    #: Where the traces are exported to, ``otlp`` for an OpenTelemetry
+    #: collector or ``file`` for ``TRACING_FILE``. Unset disables tracing.
+    TRACING_EXPORTER: str | None = None
+
+    #: The OTLP/HTTP endpoint of the collector.
+    TRACING_OTLP_ENDPOINT: str = "http://localhost:4318/v1/traces"
+
+    #: The file the spans are appended to, one JSON object per line.
+    TRACING_FILE: str = "traces.jsonl"
+
+    #: The name of the service in the traces.
+    TRACING_SERVICE_NAME: str = "complaint-system"
+
+    #: Install the profiling middleware, which needs the ``profiling`` extra.
+    PROFILING_ENABLED: bool = False
+
+    #: The share of the requests whose profile is stored without being asked
+    #: for.
+    PROFILING_SAMPLE_RATE: float = 0.0
+
+    #: The directory the profiles of the sampled requests are stored in.
+    PROFILING_DIRECTORY: str = "profiles"
+
+    #: The number of seconds between two samples of a profile.
+    PROFILING_INTERVAL_SECONDS: float = 0.001
+
+    #: Reject the clients that log in or submit complaints too often.
+    RATE_LIMIT_ENABLED: bool = True
+
+    #: Where the token buckets are kept, ``memory`` for every process on its
+    #: own or ``redis`` for ``RATE_LIMIT_REDIS_URL``, shared by all of them.
+    RATE_LIMIT_BACKEND: str = "memory"
+
+    #: The Redis server of the ``redis`` backend, which needs the ``redis``
+    #: extra.
+    RATE_LIMIT_REDIS_URL: str = "redis://localhost:6379/0"
+
+    #: The number of logins and registrations a client address may attempt
+    #: per minute.
+    RATE_LIMIT_LOGIN_PER_MINUTE: float = 10.0
+
+    #: The number of logins and registrations a client address may attempt
+    #: in a burst.
+    RATE_LIMIT_LOGIN_BURST: int = 5
+
+    #: The number of complaints a user may submit per minute.
+    RATE_LIMIT_COMPLAINTS_PER_MINUTE: float = 6.0
+
+    #: The number of complaints a user may submit in a burst.
+    RATE_LIMIT_COMPLAINTS_BURST: int = 3
+
+    #: The number of complaints that may be submitted per minute from a
+    #: client address, by any number of users.
+    RATE_LIMIT_COMPLAINTS_PER_IP_PER_MINUTE: float = 30.0
+
+    #: The number of complaints that may be submitted in a burst from a
+    #: client address.
+    RATE_LIMIT_COMPLAINTS_PER_IP_BURST: int = 10
+
+    #: The number of hours the response to a request with an
+    #: ``Idempotency-Key`` is replayed for.
+    IDEMPOTENCY_KEY_TTL_HOURS: int = 24
+
+    #: The number of background jobs a worker runs concurrently.
+    JOB_WORKER_CONCURRENCY: int = 4
+
+    #: The number of seconds an idle worker waits before polling for jobs.
+    JOB_POLL_INTERVAL_SECONDS: float = 1.0
+
+    #: The number of seconds after which a running job is considered lost
+    #: and handed to another worker.
+    JOB_LEASE_SECONDS: int = 300
+
+    #: The number of times a job is attempted before it fails for good.
+    JOB_MAX_ATTEMPTS: int = 8
+
+    #: The delay before the first retry of a failed job. The delay doubles
+    #: with every further attempt.
+    JOB_RETRY_BASE_SECONDS: float = 5.0
+
+    #: The upper bound of the delay between two attempts of a job.
+    JOB_RETRY_MAX_SECONDS: float = 600.0
+
     #: This URL is derived from ``DATABASE_URL`` and not from the environment.
     DATABASE_URL: str = Field(default=...)
 
@@ -42,6 +174,9 @@ class Settings(BaseSettings):
     #: The time in minutes after which an access token will expire.
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
 
+    #: The time in days after which an unused refresh token will expire.
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 30
+
     #: The URL path prefix for the API version.
     API_VERSION_URL: str = "/api/v1"
 
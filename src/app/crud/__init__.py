@@ -5,8 +5,24 @@ Taken directly from tiangolo/full-stack-fastapi-postgresql.
 """
 from __future__ import annotations
 
+from .archive import archive
 from .complaint import complaint
+from .idempotency import idempotency_key
+from .ingestion import ingestion_job
+from .job import job
+from .refresh_token import refresh_token
+from .stats import complaint_stats
 from .transaction import transaction
 from .user import user
 
-__all__ = ["user", "complaint", "transaction"]
+__all__ = [
+    "user",
+    "complaint",
+    "transaction",
+    "complaint_stats",
+    "archive",
+    "ingestion_job",
+    "job",
+    "idempotency_key",
+    "refresh_token",
+]
@@ -0,0 +1,103 @@
+"""Module for moving closed complaints to the archive tables."""
+from __future__ import annotations
+
+import typing
+
+from sqlalchemy import delete, insert, union_all
+from sqlalchemy.orm import aliased, class_mapper
+from sqlmodel import col, select
+
+from ..models.archive import ComplaintArchive, TransactionArchive
+from ..models.complaint import Complaint
+from ..models.enums import ComplaintStatus
+from ..models.transaction import Transaction
+
+if typing.TYPE_CHECKING:
+    from datetime import datetime
+
+    from sqlmodel.ext.asyncio.session import AsyncSession
+
+#: Complaints with these statuses will not change anymore
+CLOSED_STATUSES = (ComplaintStatus.APPROVED, ComplaintStatus.REJECTED)
+
+
+def complaints_with_archived() -> type[Complaint]:
+    """Create an alias of ``Complaint`` that also covers archived complaints.
+
+    Returns:
+        An alias that can be queried just like the ``Complaint`` model.
+    """
+    live = class_mapper(Complaint).local_table
+    archived = class_mapper(ComplaintArchive).local_table
+    names = [column.name for column in live.columns]
+    complaints = union_all(
+        select(*[live.c[name] for name in names]),
+        select(*[archived.c[name] for name in names]),
+    ).subquery("complaint_all")
+    return typing.cast("type[Complaint]", aliased(Complaint, complaints))
+
+
+class CRUDArchive:
+    """
+    Moves closed complaints and their transactions out of the hot tables.
+
+    Archived complaints keep their ids, so they can still be read together
+    with the live ones through ``complaint.query(db, include_archived=True)``.
+    """
+
+    async def archive_closed_complaints(
+        self,
+        db: AsyncSession,
+        *,
+        created_before: datetime,
+        batch_size: int,
+    ) -> int:
+        """Archive a single batch of closed complaints.
+
+        Args:
+            db:
+                Asynchronous SQLAlchemy session object used to perform database
+                operations.
+
+        Keyword Args:
+            created_before: Only complaints created before this are archived.
+            batch_size: The maximum number of complaints to archive.
+
+        Returns:
+            The number of archived complaints. Zero means that there is
+            nothing left to archive.
+        """
+        query = (
+            select(col(Complaint.id))
+            .where(
+                col(Complaint.status).in_(CLOSED_STATUSES),
+                col(Complaint.created_at) < created_before,
+            )
+            .order_by(col(Complaint.id))
+            .limit(batch_size)
+        )
+        ids = (await db.execute(query)).scalars().all()
+        if not ids:
+            return 0
+
+        for source, target, key in [
+            (Complaint, ComplaintArchive, col(Complaint.id)),
+            (Transaction, TransactionArchive, col(Transaction.complaint_id)),
+        ]:
+            columns = class_mapper(source).local_table.columns
+            await db.execute(
+                insert(target).from_select(
+                    [column.name for column in columns],
+                    select(*columns).where(key.in_(ids)),
+                )
+            )
+        # the transactions refer to the complaints, so they go first
+        await db.execute(
+            delete(Transaction).where(col(Transaction.complaint_id).in_(ids))
+        )
+        await db.execute(delete(Complaint).where(col(Complaint.id).in_(ids)))
+        await db.commit()
+        return len(ids)
+
+
+archive = CRUDArchive()
@@ -10,10 +10,12 @@ from typing import Generic, TypeVar
 from sqlalchemy.exc import IntegrityError
 from sqlmodel import SQLModel, select
 
+from .. import tracing
 from ..exc import DoesNotExistError, NotUniqueError
 from ..models.base import SQLBase
 
 if typing.TYPE_CHECKING:
+    from sqlalchemy.engine import Row
     from sqlmodel.ext.asyncio.session import AsyncSession
 
 
@@ -38,6 +40,36 @@ class BaseQueryBuilder(Generic[ModelType]):
         self.query = self.query.limit(limit)
         return self
 
+    def offset(self: _T, offset: int) -> _T:
+        """Skip a number of rows.
+
+        Unlike :meth:`skip`, this does not depend on the ordering by ``id``
+        and works with any ordering, at the cost of scanning the skipped rows.
+        """
+        self.query = self.query.offset(offset)
+        return self
+
+    def project(self: _T, schema: type[SQLModel]) -> _T:
+        """Select only the columns required to build ``schema``.
+
+        The projected results must be fetched with :meth:`rows`, which returns
+        lightweight rows instead of ORM objects tracked by the session.
+
+        Args:
+            schema: A read schema whose fields are all columns of the model.
+
+        Returns:
+            The query builder.
+        """
+        columns = [getattr(self.model, name) for name in schema.__fields__]
+        self.query = self.query.with_only_columns(  # type: ignore[assignment]
+            *columns
+        )
+        return self
+
+    async def rows(self) -> list[Row[typing.Any]]:
+        return list((await self.db.execute(self.query)).all())
+
     async def all(self) -> list[ModelType]:
         return (await self.db.execute(self.query)).scalars().all()
 
@@ -63,8 +95,15 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     and UpdateSchemaType. The ModelType is the database model class, the
     CreateSchemaType is the schema for the create operation, and the
     UpdateSchemaType is the schema for the update operation.
+
+    The public coroutine methods of the class and its subclasses run in spans
+    of the current trace.
     """
 
+    def __init_subclass__(cls, **kwargs: typing.Any) -> None:
+        super().__init_subclass__(**kwargs)
+        tracing.trace_methods(cls)
+
     def __init__(self, model: type[ModelType]) -> None:
         self.model = model
 
@@ -199,3 +238,6 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
             raise DoesNotExistError(msg)
         await db.delete(obj)
         await db.commit()
+
+
+tracing.trace_methods(CRUDBase)
@@ -1,16 +1,41 @@
 from __future__ import annotations
 
 import typing
+from decimal import Decimal
 
 if typing.TYPE_CHECKING:
+    from datetime import datetime
+
+    from sqlalchemy import ColumnElement
+    from sqlmodel import SQLModel
     from sqlmodel.ext.asyncio.session import AsyncSession
 
-    from ..models.enums import ComplaintStatus
     from ..models.user import User
 
+from sqlalchemy import column, func, insert, literal_column, table, update
+from sqlalchemy.orm import joinedload
+from sqlmodel import col
+
 from ..exc import DoesNotExistError
 from ..models.complaint import Complaint, ComplaintCreate, ComplaintUpdate
+from ..models.enums import ComplaintStatus, TransferStatus
+from .archive import complaints_with_archived
 from .base import BaseQueryBuilder, CRUDBase
+from .job import job
+from .stats import complaint_stats
+
+#: The name of the background task that issues the transfer of a complaint
+TRANSFER_TASK = "issue_transfer"
+
+#: The FTS5 index of the complaint titles and descriptions on SQLite
+complaint_fts = table("complaint_fts", column("rowid"), column("rank"))
+
+
+def _fts5_query(terms: str) -> str:
+    # quote every term so that user input is never parsed as FTS5 syntax
+    return " ".join(
+        '"{}"'.format(term.replace('"', '""')) for term in terms.split()
+    )
 
 
 class ComplaintQueryBuilder(BaseQueryBuilder[Complaint]):
@@ -24,9 +49,93 @@ class ComplaintQueryBuilder(BaseQueryBuilder[Complaint]):
         self.query = self.query.where(self.model.status == status)
         return self
 
+    def filter_by_created_at(
+        self,
+        *,
+        after: datetime | None = None,
+        before: datetime | None = None,
+    ) -> ComplaintQueryBuilder:
+        """Match complaints created in the half-open range [after, before)."""
+        if after is not None:
+            self.query = self.query.where(col(self.model.created_at) >= after)
+        if before is not None:
+            self.query = self.query.where(col(self.model.created_at) < before)
+        return self
+
+    def filter_by_amount(
+        self,
+        *,
+        minimum: Decimal | None = None,
+        maximum: Decimal | None = None,
+    ) -> ComplaintQueryBuilder:
+        """Match complaints with an amount in the range [minimum, maximum]."""
+        if minimum is not None:
+            self.query = self.query.where(self.model.amount >= minimum)
+        if maximum is not None:
+            self.query = self.query.where(self.model.amount <= maximum)
+        return self
+
+    def search(self, terms: str) -> ComplaintQueryBuilder:
+        """Match complaints whose title or description contain all terms.
+
+        The results are ordered by relevance, so they should be paginated with
+        :meth:`offset` instead of :meth:`skip`.
+        """
+        if self.db.bind.dialect.name == "postgresql":
+            vector: ColumnElement[typing.Any] = literal_column(
+                "complaint.search_vector"
+            )
+            tsquery = func.websearch_to_tsquery(
+                literal_column("'english'::regconfig"), terms
+            )
+            rank: ColumnElement[typing.Any] = func.ts_rank(
+                vector, tsquery
+            ).desc()
+            self.query = self.query.where(vector.op("@@")(tsquery))
+        else:
+            rank = complaint_fts.c.rank
+            self.query = self.query.join(
+                complaint_fts, complaint_fts.c.rowid == self.model.id
+            ).where(
+                literal_column("complaint_fts").op("MATCH")(_fts5_query(terms))
+            )
+        self.query = self.query.order_by(None).order_by(
+            rank, col(self.model.id)
+        )
+        return self
+
+    def with_user(self) -> ComplaintQueryBuilder:
+        """Load the complainer of each complaint in the same query."""
+        self.query = self.query.options(
+            joinedload(self.model.user)  # type: ignore[arg-type]
+        )
+        return self
+
 
 class CRUDComplaint(CRUDBase[Complaint, ComplaintCreate, ComplaintUpdate]):
-    def query(self, db: AsyncSession) -> ComplaintQueryBuilder:
+    def query(
+        self,
+        db: AsyncSession,
+        *,
+        include_archived: bool = False,
+    ) -> ComplaintQueryBuilder:
+        """Create a query builder for complaints.
+
+        Args:
+            db:
+                Asynchronous SQLAlchemy session object used to perform database
+                operations.
+
+        Keyword Args:
+            include_archived:
+                Also match archived complaints. Full-text search only covers
+                the complaints that have not been archived.
+
+        Returns:
+            The query builder.
+        """
+        if include_archived:
+            return ComplaintQueryBuilder(complaints_with_archived(), db)
         return ComplaintQueryBuilder(self.model, db)
 
     async def get_by_id(
@@ -34,6 +143,128 @@ class CRUDComplaint(CRUDBase[Complaint, ComplaintCreate, ComplaintUpdate]):
     ) -> Complaint | None:
         return await self.get(db, id=id)
 
+    async def create(
+        self,
+        db: AsyncSession,
+        *,
+        obj_in: ComplaintCreate,
+        **kwargs: SQLModel,
+    ) -> Complaint:
+        """Creates a new complaint and queues the transfer that pays it out.
+
+        The complaint is added to the complaint statistics as well.
+
+        Args:
+            db:
+                Asynchronous SQLAlchemy session object used to perform database
+                operations.
+
+        Keyword Args:
+            obj_in:
+                Data for the new complaint that will be inserted into the
+                database.
+            kwargs:
+                Additional attributes controlled by foreign keys in
+                relationships to be set on the new database object beyond those
+                specified in ``obj_in``.
+
+        Returns:
+            The created database object.
+        """
+        db_obj = self.model.from_orm(obj_in)
+        for key, value in kwargs.items():
+            setattr(db_obj, key, value)
+        # flush to resolve the complainer from the relationship
+        db.add(db_obj)
+        await db.flush()
+        await complaint_stats.apply(
+            db,
+            user_id=db_obj.complainer_id,
+            status=db_obj.status or ComplaintStatus.PENDING,
+            count=1,
+            amount=db_obj.amount,
+        )
+        await job.enqueue_many(
+            db, name=TRANSFER_TASK, payloads=[{"complaint_id": db_obj.id}]
+        )
+        return await self.add_record(db, db_obj=db_obj)
+
+    async def create_many(
+        self,
+        db: AsyncSession,
+        *,
+        objs_in: typing.Sequence[ComplaintCreate],
+        user: User,
+        ingestion_job_id: int | None = None,
+    ) -> list[int]:
+        """Creates many complaints of a user with a single multi-row insert.
+
+        A transfer is queued for every complaint.
+
+        Args:
+            db:
+                Asynchronous SQLAlchemy session object used to perform database
+                operations.
+
+        Keyword Args:
+            objs_in:
+                Data for the new complaints that will be inserted into the
+                database.
+            user: The complainer.
+            ingestion_job_id:
+                The ingestion job that records the outcome of the transfers.
+
+        Returns:
+            The ids of the created complaints, in the order of ``objs_in``.
+        """
+        assert user.id is not None
+        values = [
+            {**obj_in.dict(), "complainer_id": user.id} for obj_in in objs_in
+        ]
+        stmt = insert(self.model).values(values).returning(col(self.model.id))
+        ids = (await db.execute(stmt)).scalars().all()
+        await complaint_stats.apply(
+            db,
+            user_id=user.id,
+            status=ComplaintStatus.PENDING,
+            count=len(values),
+            amount=sum((obj_in.amount for obj_in in objs_in), Decimal(0)),
+        )
+        await job.enqueue_many(
+            db,
+            name=TRANSFER_TASK,
+            payloads=[
+                {"complaint_id": id_, "ingestion_job_id": ingestion_job_id}
+                for id_ in ids
+            ],
+        )
+        await db.commit()
+        return list(ids)
+
+    async def set_transfer_status(
+        self,
+        db: AsyncSession,
+        *,
+        id: int,
+        status: TransferStatus,
+    ) -> None:
+        """Stage a change of the transfer status of a complaint.
+
+        Args:
+            db:
+                Asynchronous SQLAlchemy session object used to perform database
+                operations.
+
+        Keyword Args:
+            id: The unique identifier/primary key for the complaint.
+            status: The new transfer status.
+        """
+        await db.execute(
+            update(self.model)
+            .where(col(self.model.id) == id)
+            .values(transfer_status=status)
+        )
+
     async def change_status_by_id(
         self,
         db: AsyncSession,
@@ -45,8 +276,58 @@ class CRUDComplaint(CRUDBase[Complaint, ComplaintCreate, ComplaintUpdate]):
         if db_complaint is None:
             msg = "complaint does not exist"
             raise DoesNotExistError(msg)
+        if db_complaint.status != status:
+            await self._move_stats(db, db_obj=db_complaint, status=status)
         complaint_in = ComplaintUpdate(status=status)
         return await self.update(db, db_obj=db_complaint, obj_in=complaint_in)
 
+    async def delete(self, db: AsyncSession, *, id: int) -> None:
+        """Deletes a complaint and removes it from the complaint statistics.
+
+        Args:
+            db:
+                Asynchronous SQLAlchemy session object used to perform database
+                operations.
+
+        Keyword Args:
+            id: The unique identifier/primary key for the complaint.
+
+        Raises:
+            DoesNotExistError: Raised if the complaint does not exist.
+        """
+        db_complaint = await self.get(db, id=id)
+        if db_complaint is None:
+            msg = "complaint does not exist"
+            raise DoesNotExistError(msg)
+        await self._move_stats(db, db_obj=db_complaint, status=None)
+        await db.delete(db_complaint)
+        await db.commit()
+
+    async def _move_stats(
+        self,
+        db: AsyncSession,
+        *,
+        db_obj: Complaint,
+        status: ComplaintStatus | None,
+    ) -> None:
+        # move the complaint out of its current status bucket and, unless it is
+        # being deleted, into the bucket of its new status
+        assert db_obj.status is not None
+        await complaint_stats.apply(
+            db,
+            user_id=db_obj.complainer_id,
+            status=db_obj.status,
+            count=-1,
+            amount=-db_obj.amount,
+        )
+        if status is not None:
+            await complaint_stats.apply(
+                db,
+                user_id=db_obj.complainer_id,
+                status=status,
+                count=1,
+                amount=db_obj.amount,
+            )
+
 
 complaint = CRUDComplaint(Complaint)
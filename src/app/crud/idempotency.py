@@ -0,0 +1,176 @@
+"""Module for the stored responses of the requests with idempotency keys."""
+from __future__ import annotations
+
+import typing
+
+from sqlalchemy import delete, update
+from sqlmodel import col
+
+from ..exc import NotUniqueError
+from ..models.idempotency import (
+    IdempotencyKey,
+    IdempotencyKeyCreate,
+    IdempotencyKeyUpdate,
+)
+from .base import BaseQueryBuilder, CRUDBase
+
+if typing.TYPE_CHECKING:
+    from datetime import datetime
+
+    from sqlalchemy import CursorResult
+    from sqlmodel.ext.asyncio.session import AsyncSession
+
+T = typing.TypeVar("T", bound="IdempotencyKeyQueryBuilder")
+
+
+class IdempotencyKeyQueryBuilder(BaseQueryBuilder[IdempotencyKey]):
+    def filter_by_key(self: T, *, user_id: int, key: str) -> T:
+        self.query = self.query.where(
+            self.model.user_id == user_id, self.model.key == key
+        )
+        return self
+
+
+class CRUDIdempotencyKey(
+    CRUDBase[IdempotencyKey, IdempotencyKeyCreate, IdempotencyKeyUpdate]
+):
+    def query(self, db: AsyncSession) -> IdempotencyKeyQueryBuilder:
+        return IdempotencyKeyQueryBuilder(self.model, db)
+
+    async def reserve(
+        self,
+        db: AsyncSession,
+        *,
+        obj_in: IdempotencyKeyCreate,
+        expires_before: datetime,
+    ) -> tuple[IdempotencyKey, bool]:
+        """Reserve a key for a request, unless it is already in use.
+
+        The unique constraint on the key decides between concurrent requests
+        with the same key, so only one of them is handled.
+
+        Args:
+            db:
+                Asynchronous SQLAlchemy session object used to perform database
+                operations.
+
+        Keyword Args:
+            obj_in: The key, its user and the fingerprint of the request.
+            expires_before: Keys created before this may be used again.
+
+        Returns:
+            The record of the key and whether it has just been reserved. A
+            record that has not been reserved belongs to an earlier request
+            with the key.
+
+        Raises:
+            NotUniqueError:
+                Raised if the key can neither be stored nor found, for example
+                as its user does not exist anymore.
+        """
+        retried = False
+        while True:
+            try:
+                return await self.create(db, obj_in=obj_in), True
+            except NotUniqueError:
+                await db.rollback()
+                db_obj = (
+                    await self.query(db)
+                    .filter_by_key(user_id=obj_in.user_id, key=obj_in.key)
+                    .one_or_none()
+                )
+                if db_obj is not None:
+                    assert db_obj.created_at is not None
+                    if db_obj.created_at >= expires_before:
+                        return db_obj, False
+                # the insert also fails for other reasons than the key
+                if retried:
+                    raise
+
+            # the key has expired, or its request failed in the meantime
+            await db.execute(
+                delete(self.model).where(
+                    col(self.model.user_id) == obj_in.user_id,
+                    col(self.model.key) == obj_in.key,
+                    col(self.model.created_at) < expires_before,
+                )
+            )
+            await db.commit()
+            retried = True
+
+    async def complete(
+        self,
+        db: AsyncSession,
+        *,
+        id: int,
+        status_code: int,
+        content_type: str | None,
+        body: bytes,
+    ) -> None:
+        """Store the response to the request of a reserved key.
+
+        Args:
+            db:
+                Asynchronous SQLAlchemy session object used to perform database
+                operations.
+
+        Keyword Args:
+            id: The id of the record of the key.
+            status_code: The status code of the response.
+            content_type: The content type of the response.
+            body: The body of the response.
+        """
+        await db.execute(
+            update(self.model)
+            .where(col(self.model.id) == id)
+            .values(
+                status_code=status_code,
+                content_type=content_type,
+                response_body=body,
+            )
+        )
+        await db.commit()
+
+    async def release(self, db: AsyncSession, *, id: int) -> None:
+        """Free a reserved key, so that its request can be retried.
+
+        Args:
+            db:
+                Asynchronous SQLAlchemy session object used to perform database
+                operations.
+
+        Keyword Args:
+            id: The id of the record of the key.
+        """
+        await db.execute(delete(self.model).where(col(self.model.id) == id))
+        await db.commit()
+
+    async def purge(
+        self, db: AsyncSession, *, created_before: datetime
+    ) -> int:
+        """Delete the keys created before the given time.
+
+        Args:
+            db:
+                Asynchronous SQLAlchemy session object used to perform database
+                operations.
+
+        Keyword Args:
+            created_before: The keys created before this are deleted.
+
+        Returns:
+            The number of deleted keys.
+        """
+        result = typing.cast(
+            "CursorResult[typing.Any]",
+            await db.execute(
+                delete(self.model).where(
+                    col(self.model.created_at) < created_before
+                )
+            ),
+        )
+        await db.commit()
+        return result.rowcount
+
+
+idempotency_key = CRUDIdempotencyKey(IdempotencyKey)
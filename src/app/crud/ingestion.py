@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import typing
+
+from sqlalchemy import func, update
+from sqlmodel import col
+
+from ..models.ingestion import (
+    IngestionJob,
+    IngestionJobCreate,
+    IngestionJobUpdate,
+)
+from .base import CRUDBase
+
+if typing.TYPE_CHECKING:
+    from sqlmodel.ext.asyncio.session import AsyncSession
+
+
+class CRUDIngestionJob(
+    CRUDBase[IngestionJob, IngestionJobCreate, IngestionJobUpdate]
+):
+    async def stage(
+        self, db: AsyncSession, *, obj_in: IngestionJobCreate
+    ) -> IngestionJob:
+        """Add a job to the current transaction without committing it.
+
+        The job is flushed, so that its id can be referred to by the
+        complaints committed along with it.
+
+        Args:
+            db:
+                Asynchronous SQLAlchemy session object used to perform database
+                operations.
+
+        Keyword Args:
+            obj_in: Data for the new job.
+
+        Returns:
+            The staged job.
+        """
+        db_obj = self.model.from_orm(obj_in)
+        db.add(db_obj)
+        await db.flush()
+        return db_obj
+
+    async def record_result(
+        self,
+        db: AsyncSession,
+        *,
+        id: int,
+        succeeded: bool,
+    ) -> None:
+        """Count the final outcome of a single complaint of the job.
+
+        The counters are incremented in the database, so concurrent workers do
+        not overwrite each other's progress. The job is marked as finished
+        once every complaint has an outcome. The change is only staged in the
+        current transaction.
+
+        Args:
+            db:
+                Asynchronous SQLAlchemy session object used to perform database
+                operations.
+
+        Keyword Args:
+            id: The id of the job.
+            succeeded: Whether the transfer of the complaint was issued.
+        """
+        counter = col(self.model.succeeded if succeeded else self.model.failed)
+        await db.execute(
+            update(self.model)
+            .where(col(self.model.id) == id)
+            .values({counter: counter + 1})
+        )
+        await db.execute(
+            update(self.model)
+            .where(
+                col(self.model.id) == id,
+                col(self.model.finished_at).is_(None),
+                col(self.model.succeeded) + col(self.model.failed)
+                >= col(self.model.total),
+            )
+            .values(finished_at=func.now())
+        )
+
+
+ingestion_job = CRUDIngestionJob(IngestionJob)
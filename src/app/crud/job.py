@@ -0,0 +1,205 @@
+"""Module for the persistent queue of background jobs."""
+from __future__ import annotations
+
+import typing
+from datetime import datetime, timedelta
+
+from sqlalchemy import Update, insert, or_, update
+from sqlmodel import col, select
+
+from .. import tracing
+from ..core import settings
+from ..models.enums import JobStatus
+from ..models.job import Job, JobCreate, JobUpdate
+from .base import CRUDBase
+
+if typing.TYPE_CHECKING:
+    from sqlalchemy import CursorResult
+    from sqlmodel.ext.asyncio.session import AsyncSession
+
+
+class CRUDJob(CRUDBase[Job, JobCreate, JobUpdate]):
+    async def enqueue_many(
+        self,
+        db: AsyncSession,
+        *,
+        name: str,
+        payloads: typing.Sequence[dict[str, typing.Any]],
+    ) -> None:
+        """Add jobs to the queue.
+
+        The jobs are only staged in the current transaction, so that they are
+        committed together with the data they work on. The current trace
+        context is added to the payloads, so the jobs continue the trace.
+
+        Args:
+            db:
+                Asynchronous SQLAlchemy session object used to perform database
+                operations.
+
+        Keyword Args:
+            name: The name of the task that runs the jobs.
+            payloads: The arguments of the task, one per job.
+        """
+        now = datetime.utcnow()
+        if trace_context := tracing.inject():
+            payloads = [
+                {**payload, tracing.PAYLOAD_KEY: trace_context}
+                for payload in payloads
+            ]
+        values = [
+            JobCreate(
+                name=name,
+                payload=payload,
+                max_attempts=settings.JOB_MAX_ATTEMPTS,
+                run_after=now,
+            ).dict()
+            for payload in payloads
+        ]
+        await db.execute(insert(self.model).values(values))
+
+    async def claim(
+        self,
+        db: AsyncSession,
+        *,
+        lease: timedelta,
+    ) -> Job | None:
+        """Take the next job that is due off the queue.
+
+        A job is claimed with a conditional update, so concurrent workers
+        never run the same job. Running jobs whose lease expired are claimed
+        again.
+
+        Args:
+            db:
+                Asynchronous SQLAlchemy session object used to perform database
+                operations.
+
+        Keyword Args:
+            lease: How long the job is reserved for the caller.
+
+        Returns:
+            The claimed job or ``None`` if no job is due or another worker
+            claimed it first.
+        """
+        now = datetime.utcnow()
+        query = (
+            select(
+                col(self.model.id),
+                col(self.model.status),
+                col(self.model.run_after),
+            )
+            .where(
+                or_(
+                    col(self.model.status) == JobStatus.QUEUED,
+                    col(self.model.status) == JobStatus.RUNNING,
+                ),
+                col(self.model.run_after) <= now,
+            )
+            .order_by(col(self.model.run_after))
+            .limit(1)
+        )
+        candidate = (await db.execute(query)).one_or_none()
+        if candidate is None:
+            return None
+
+        statement = (
+            update(self.model)
+            .where(
+                col(self.model.id) == candidate.id,
+                col(self.model.status) == candidate.status,
+                col(self.model.run_after) == candidate.run_after,
+            )
+            .values(
+                status=JobStatus.RUNNING,
+                attempts=col(self.model.attempts) + 1,
+                run_after=now + lease,
+            )
+        )
+        result = typing.cast(
+            "CursorResult[typing.Any]", await db.execute(statement)
+        )
+        await db.commit()
+        if result.rowcount != 1:
+            return None
+        return await self.get(db, id=candidate.id)
+
+    def _leased(self, *, id: int, attempt: int) -> Update:
+        # a job is claimed again once its lease expires, which counts another
+        # attempt, so a worker that lost the lease does not match anymore
+        return update(self.model).where(
+            col(self.model.id) == id,
+            col(self.model.status) == JobStatus.RUNNING,
+            col(self.model.attempts) == attempt,
+        )
+
+    async def succeed(
+        self, db: AsyncSession, *, id: int, attempt: int
+    ) -> bool:
+        """Record the success of a job.
+
+        Args:
+            db:
+                Asynchronous SQLAlchemy session object used to perform database
+                operations.
+
+        Keyword Args:
+            id: The id of the job.
+            attempt: The attempt of the job that succeeded.
+
+        Returns:
+            ``False`` if the lease of the attempt was lost and the outcome
+            was not recorded.
+        """
+        statement = self._leased(id=id, attempt=attempt).values(
+            status=JobStatus.SUCCEEDED, finished_at=datetime.utcnow()
+        )
+        result = typing.cast(
+            "CursorResult[typing.Any]", await db.execute(statement)
+        )
+        await db.commit()
+        return result.rowcount == 1
+
+    async def fail(
+        self,
+        db: AsyncSession,
+        *,
+        id: int,
+        attempt: int,
+        error: str,
+        retry_in: timedelta | None,
+    ) -> bool:
+        """Record a failed attempt of a job and schedule its retry.
+
+        Args:
+            db:
+                Asynchronous SQLAlchemy session object used to perform database
+                operations.
+
+        Keyword Args:
+            id: The id of the job.
+            attempt: The attempt of the job that failed.
+            error: A description of the error.
+            retry_in:
+                The delay before the job is attempted again, or ``None`` if
+                the job has used up its attempts and fails for good.
+
+        Returns:
+            ``False`` if the lease of the attempt was lost and the outcome
+            was not recorded.
+        """
+        now = datetime.utcnow()
+        values: dict[str, typing.Any] = {"last_error": error}
+        if retry_in is None:
+            values.update(status=JobStatus.FAILED, finished_at=now)
+        else:
+            values.update(status=JobStatus.QUEUED, run_after=now + retry_in)
+        statement = self._leased(id=id, attempt=attempt).values(values)
+        result = typing.cast(
+            "CursorResult[typing.Any]", await db.execute(statement)
+        )
+        await db.commit()
+        return result.rowcount == 1
+
+
+job = CRUDJob(Job)
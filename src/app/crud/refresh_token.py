@@ -0,0 +1,199 @@
+"""Module for the server-side state of the refresh tokens."""
+from __future__ import annotations
+
+import logging
+import typing
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, insert, update
+from sqlmodel import col, select
+
+from ..core import security, settings
+from ..exc import InvalidRefreshTokenError
+from ..models.refresh_token import (
+    RefreshToken,
+    RefreshTokenCreate,
+    RefreshTokenUpdate,
+)
+from .base import CRUDBase
+
+if typing.TYPE_CHECKING:
+    from sqlalchemy import CursorResult
+    from sqlmodel.ext.asyncio.session import AsyncSession
+
+logger = logging.getLogger(__name__)
+
+
+class CRUDRefreshToken(
+    CRUDBase[RefreshToken, RefreshTokenCreate, RefreshTokenUpdate]
+):
+    async def issue(
+        self,
+        db: AsyncSession,
+        *,
+        user_id: int,
+        family: str | None = None,
+    ) -> str:
+        """Create a refresh token for a user.
+
+        Args:
+            db:
+                Asynchronous SQLAlchemy session object used to perform database
+                operations.
+
+        Keyword Args:
+            user_id: The id of the user the token belongs to.
+            family:
+                The family of the token that is replaced, or ``None`` to start
+                a new family at a login.
+
+        Returns:
+            The refresh token, of which only the hash is stored.
+        """
+        refresh_token = security.create_refresh_token()
+        obj_in = RefreshTokenCreate(
+            token_hash=security.hash_refresh_token(refresh_token),
+            family=family or uuid.uuid4().hex,
+            user_id=user_id,
+            expires_at=datetime.utcnow()
+            + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+        )
+        await db.execute(insert(self.model).values(obj_in.dict()))
+        await db.commit()
+        return refresh_token
+
+    async def rotate(
+        self,
+        db: AsyncSession,
+        *,
+        refresh_token: str,
+    ) -> tuple[int, str]:
+        """Replace a refresh token with a new one of the same family.
+
+        The token is revoked with a conditional update, so concurrent
+        refreshes with the same token never both succeed. Using a token that
+        has already been replaced revokes its whole family, as either the
+        user or an attacker holds a stolen token.
+
+        Args:
+            db:
+                Asynchronous SQLAlchemy session object used to perform database
+                operations.
+
+        Keyword Args:
+            refresh_token: The refresh token sent by the user.
+
+        Returns:
+            The id of the user and the new refresh token.
+
+        Raises:
+            InvalidRefreshTokenError:
+                Raised if the token is unknown, expired or revoked.
+        """
+        now = datetime.utcnow()
+        token_hash = security.hash_refresh_token(refresh_token)
+        result = await db.execute(
+            update(self.model)
+            .where(
+                col(self.model.token_hash) == token_hash,
+                col(self.model.revoked_at).is_(None),
+                col(self.model.expires_at) > now,
+            )
+            .values(revoked_at=now)
+            .returning(col(self.model.user_id), col(self.model.family))
+        )
+        row = result.one_or_none()
+        if row is None:
+            await db.rollback()
+            if await self._revoke_family(
+                db, token_hash=token_hash, now=now, replaced_only=True
+            ):
+                logger.warning(
+                    "a replaced refresh token was used, its family has been "
+                    "revoked"
+                )
+            msg = "the refresh token is unknown, expired or revoked"
+            raise InvalidRefreshTokenError(msg)
+
+        # committed together with the revocation of the old token
+        new_token = await self.issue(
+            db, user_id=row.user_id, family=row.family
+        )
+        return row.user_id, new_token
+
+    async def revoke(self, db: AsyncSession, *, refresh_token: str) -> None:
+        """Revoke a refresh token and every other token of its family.
+
+        Args:
+            db:
+                Asynchronous SQLAlchemy session object used to perform database
+                operations.
+
+        Keyword Args:
+            refresh_token: The refresh token sent by the user.
+        """
+        await self._revoke_family(
+            db,
+            token_hash=security.hash_refresh_token(refresh_token),
+            now=datetime.utcnow(),
+        )
+
+    async def _revoke_family(
+        self,
+        db: AsyncSession,
+        *,
+        token_hash: str,
+        now: datetime,
+        replaced_only: bool = False,
+    ) -> int:
+        family = select(self.model.family).where(
+            self.model.token_hash == token_hash
+        )
+        if replaced_only:
+            family = family.where(col(self.model.revoked_at).is_not(None))
+        result = typing.cast(
+            "CursorResult[typing.Any]",
+            await db.execute(
+                update(self.model)
+                .where(
+                    col(self.model.family).in_(family),
+                    col(self.model.revoked_at).is_(None),
+                )
+                .values(revoked_at=now)
+            ),
+        )
+        await db.commit()
+        return result.rowcount
+
+    async def purge(
+        self, db: AsyncSession, *, expired_before: datetime
+    ) -> int:
+        """Delete the refresh tokens that expired before the given time.
+
+        Revoked tokens are kept until they expire, to recognize their reuse.
+
+        Args:
+            db:
+                Asynchronous SQLAlchemy session object used to perform database
+                operations.
+
+        Keyword Args:
+            expired_before: The tokens that expired before this are deleted.
+
+        Returns:
+            The number of deleted tokens.
+        """
+        result = typing.cast(
+            "CursorResult[typing.Any]",
+            await db.execute(
+                delete(self.model).where(
+                    col(self.model.expires_at) < expired_before
+                )
+            ),
+        )
+        await db.commit()
+        return result.rowcount
+
+
+refresh_token = CRUDRefreshToken(RefreshToken)
@@ -0,0 +1,136 @@
+"""Module for maintaining the complaint statistics summary table."""
+from __future__ import annotations
+
+import typing
+
+from sqlalchemy import delete, func, insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlmodel import col, select
+
+from ..models.stats import ComplaintStats
+from .archive import complaints_with_archived
+
+if typing.TYPE_CHECKING:
+    from decimal import Decimal
+
+    from sqlmodel.ext.asyncio.session import AsyncSession
+
+    from ..models.enums import ComplaintStatus
+
+
+class CRUDComplaintStats:
+    """
+    Incrementally maintained totals of complaints per user and status.
+
+    The write methods only stage their changes in the current transaction, so
+    that the totals are committed together with the complaint they describe.
+    """
+
+    def __init__(self, model: type[ComplaintStats]) -> None:
+        self.model = model
+
+    async def apply(
+        self,
+        db: AsyncSession,
+        *,
+        user_id: int,
+        status: ComplaintStatus,
+        count: int,
+        amount: Decimal,
+    ) -> None:
+        """Add a delta to the totals of a user's complaints with a status.
+
+        Args:
+            db:
+                Asynchronous SQLAlchemy session object used to perform database
+                operations.
+
+        Keyword Args:
+            user_id: The id of the complainer.
+            status: The status of the complaints.
+            count: The change in the number of complaints.
+            amount: The change in the total amount of the complaints.
+        """
+        upsert = (
+            postgresql.insert
+            if db.bind.dialect.name == "postgresql"
+            else sqlite.insert
+        )
+        stmt = upsert(self.model).values(
+            user_id=user_id,
+            status=status,
+            complaint_count=count,
+            total_amount=amount,
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[col(self.model.user_id), col(self.model.status)],
+            set_={
+                "complaint_count": (
+                    col(self.model.complaint_count)
+                    + stmt.excluded.complaint_count
+                ),
+                "total_amount": (
+                    col(self.model.total_amount) + stmt.excluded.total_amount
+                ),
+            },
+        )
+        await db.execute(stmt)
+
+    async def get_multi(
+        self,
+        db: AsyncSession,
+        *,
+        user_id: int | None = None,
+    ) -> list[ComplaintStats]:
+        """Retrieve the totals, optionally only those of a single user.
+
+        Args:
+            db:
+                Asynchronous SQLAlchemy session object used to perform database
+                operations.
+
+        Keyword Args:
+            user_id: The id of the complainer.
+
+        Returns:
+            The totals ordered by user and status.
+        """
+        query = select(self.model).order_by(
+            col(self.model.user_id), col(self.model.status)
+        )
+        if user_id is not None:
+            query = query.where(self.model.user_id == user_id)
+        return list((await db.execute(query)).scalars().all())
+
+    async def refresh(self, db: AsyncSession) -> None:
+        """Recompute all totals from the live and archived complaints.
+
+        Args:
+            db:
+                Asynchronous SQLAlchemy session object used to perform database
+                operations.
+        """
+        complaints = complaints_with_archived()
+        complainer_id = col(complaints.complainer_id)
+        status = col(complaints.status)
+        totals = (
+            select(
+                complainer_id,
+                status,
+                func.count(),
+                func.sum(complaints.amount),
+            )
+            .where(complainer_id.is_not(None))
+            .group_by(complainer_id, status)
+        )
+        await db.execute(delete(self.model))
+        await db.execute(
+            insert(self.model).from_select(
+                ["user_id", "status", "complaint_count", "total_amount"],
+                totals,
+            )
+        )
+        await db.commit()
+
+
+complaint_stats = CRUDComplaintStats(ComplaintStats)
@@ -1,17 +1,23 @@
 """Module for User CRUD operations."""
 from __future__ import annotations
 
+import asyncio
 import typing
 
 if typing.TYPE_CHECKING:
+    from concurrent.futures import Executor
+
     from pydantic import EmailStr
     from sqlmodel import SQLModel
     from sqlmodel.ext.asyncio.session import AsyncSession
 
-    from ..models.enums import Role
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import selectinload
 
 from ..core import security
-from ..exc import DoesNotExistError
+from ..exc import DoesNotExistError, NotUniqueError
+from ..models.enums import Role
 from ..models.user import User, UserCreate, UserUpdate
 from .base import BaseQueryBuilder, CRUDBase
 
@@ -21,6 +27,13 @@ class UserQueryBuilder(BaseQueryBuilder[User]):
         self.query = self.query.where(self.model.email == email)
         return self
 
+    def with_complaints(self) -> UserQueryBuilder:
+        """Load the complaints of all selected users in one extra query."""
+        self.query = self.query.options(
+            selectinload(self.model.complaints)  # type: ignore[arg-type]
+        )
+        return self
+
 
 class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
     """
@@ -62,6 +75,67 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
         obj_in.password = security.get_password_hash(obj_in.password)
         return await super().create(db, obj_in=obj_in, **kwargs)
 
+    async def create_many(
+        self,
+        db: AsyncSession,
+        *,
+        objs_in: typing.Sequence[UserCreate],
+        role: Role = Role.COMPLAINER,
+        executor: Executor | None = None,
+    ) -> int:
+        """Creates many users with a single multi-row insert.
+
+        The passwords are hashed in parallel on ``executor`` and the role is
+        set directly, so no further statements are needed.
+
+        Args:
+            db:
+                Asynchronous SQLAlchemy session object used to perform database
+                operations.
+
+        Keyword Args:
+            objs_in:
+                Data for the new users that will be inserted into the database.
+            role: The role of the new users.
+            executor:
+                The executor to hash the passwords on. Hashing is CPU-bound, so
+                a process pool gives the best throughput. The default executor
+                of the event loop is used if not given.
+
+        Returns:
+            The number of created users.
+
+        Raises:
+            NotUniqueError: If any of the users already exists in database.
+        """
+        if not objs_in:
+            return 0
+        loop = asyncio.get_running_loop()
+        hashes = await asyncio.gather(
+            *(
+                loop.run_in_executor(
+                    executor, security.get_password_hash, obj_in.password
+                )
+                for obj_in in objs_in
+            )
+        )
+        values = [
+            {
+                **obj_in.dict(exclude={"password"}),
+                "password": hash_,
+                "role": role,
+            }
+            for obj_in, hash_ in zip(objs_in, hashes)
+        ]
+        try:
+            await db.execute(insert(self.model).values(values))
+            await db.commit()
+        except IntegrityError as e:
+            await db.rollback()
+            msg = "field(s) must be unique"
+            raise NotUniqueError(msg) from e
+        return len(values)
+
     async def update(
         self,
         db: AsyncSession,
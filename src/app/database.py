@@ -7,12 +7,15 @@ from sqlalchemy.ext.asyncio import create_async_engine
 from sqlmodel.ext.asyncio.session import AsyncSession
 from typing_extensions import Annotated
 
+from . import querylog, tracing
 from .core import settings
 
 engine = create_async_engine(
     settings.DATABASE_URL,
     pool_pre_ping=True,
 )
+querylog.instrument_engine(engine)
+tracing.instrument_engine(engine)
 
 
 async def get_db() -> typing.AsyncIterable[AsyncSession]:
@@ -33,3 +33,22 @@ class CancelledTransactionError(Exception):
     Exception class representing an error that occurs when a bank transaction
     has already been cancelled.
     """
+
+
+class InvalidRefreshTokenError(Exception):
+    """
+    Exception class representing an error that occurs when a refresh token is
+    unknown, expired or revoked.
+    """
+
+
+class ServiceUnavailableError(Exception):
+    """
+    Exception class representing an error that occurs when an external service
+    is not called because it is unhealthy or overloaded.
+    """
+
+    def __init__(self, msg: str, *, retry_after: float | None = None) -> None:
+        super().__init__(msg)
+        #: The number of seconds after which the service may be available
+        self.retry_after = retry_after
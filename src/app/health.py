@@ -0,0 +1,151 @@
+"""Health checks of the database and the external services.
+
+The dependencies are checked concurrently, each with its own timeout, so a
+slow dependency delays the report by at most the timeout instead of holding
+up the others.
+"""
+from __future__ import annotations
+
+import asyncio
+import enum
+import logging
+import time
+import typing
+from datetime import datetime
+
+from pydantic import BaseModel
+from sqlmodel import text
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from .database import engine
+
+if typing.TYPE_CHECKING:
+    from .services.container import ServiceContainer
+
+logger = logging.getLogger(__name__)
+
+Check = typing.Callable[[], typing.Awaitable[None]]
+
+#: The dependencies without which no request can be served
+REQUIRED = {"database"}
+
+
+class HealthStatus(str, enum.Enum):
+    #: Every dependency is healthy.
+    OK = "ok"
+    #: An external service is unhealthy, requests that need it fail.
+    DEGRADED = "degraded"
+    #: A required dependency is unhealthy.
+    UNAVAILABLE = "unavailable"
+
+
+class DependencyHealth(BaseModel):
+    name: str
+    healthy: bool
+    latency_seconds: float
+    error: str | None = None
+
+
+class HealthReport(BaseModel):
+    status: HealthStatus
+    checked_at: datetime
+    dependencies: list[DependencyHealth]
+
+
+async def check_database() -> None:
+    async with AsyncSession(engine) as db:
+        await db.execute(text("SELECT 1;"))
+
+
+async def _check(name: str, check: Check, timeout: float) -> DependencyHealth:
+    started_at = time.monotonic()
+    try:
+        await asyncio.wait_for(check(), timeout)
+    except asyncio.TimeoutError:
+        error: str | None = f"timed out after {timeout} seconds"
+    except Exception as e:
+        # the report is public, the details only go to the log
+        logger.warning("health check of %s failed: %r", name, e)
+        error = type(e).__name__
+    else:
+        error = None
+    return DependencyHealth(
+        name=name,
+        healthy=error is None,
+        latency_seconds=time.monotonic() - started_at,
+        error=error,
+    )
+
+
+async def check_dependencies(
+    services: ServiceContainer, *, timeout: float
+) -> HealthReport:
+    """Check the database and every external service at the same time.
+
+    Args:
+        services: The clients of the external services.
+
+    Keyword Args:
+        timeout: The number of seconds each check may take.
+
+    Returns:
+        The health of every dependency.
+    """
+    checks = {"database": check_database, **services.checks()}
+    dependencies = await asyncio.gather(
+        *(_check(name, check, timeout) for name, check in checks.items())
+    )
+    unhealthy = {dep.name for dep in dependencies if not dep.healthy}
+    if unhealthy & REQUIRED:
+        status = HealthStatus.UNAVAILABLE
+    elif unhealthy:
+        status = HealthStatus.DEGRADED
+    else:
+        status = HealthStatus.OK
+    return HealthReport(
+        status=status,
+        checked_at=datetime.utcnow(),
+        dependencies=list(dependencies),
+    )
+
+
+class HealthMonitor:
+    """
+    Caches the health report, so that frequent probes do not hit the backends.
+
+    Concurrent probes that find the report expired share a single check.
+
+    Args:
+        services: The clients of the external services.
+
+    Keyword Args:
+        timeout: The number of seconds each check may take.
+        ttl: The number of seconds a report is reused for.
+    """
+
+    def __init__(
+        self,
+        services: ServiceContainer,
+        *,
+        timeout: float,
+        ttl: float,
+    ) -> None:
+        self.services = services
+        self.timeout = timeout
+        self.ttl = ttl
+        self._report: HealthReport | None = None
+        self._expires_at = 0.0
+        self._checking: asyncio.Task[HealthReport] | None = None
+
+    async def report(self) -> HealthReport:
+        if self._report is not None and time.monotonic() < self._expires_at:
+            return self._report
+        if self._checking is None or self._checking.done():
+            self._checking = asyncio.create_task(
+                check_dependencies(self.services, timeout=self.timeout)
+            )
+        # a cancelled probe must not cancel the check the others wait for
+        report = await asyncio.shield(self._checking)
+        self._report = report
+        self._expires_at = time.monotonic() + self.ttl
+        return report
@@ -0,0 +1,254 @@
+"""Safe retries of the requests that pay out money or upload photos.
+
+A client that sends an ``Idempotency-Key`` header with one of these requests
+may retry it, after a timeout for example, with the same key. The first
+request is handled and its successful response is stored; the retries get
+the stored response, with an ``Idempotent-Replayed`` header, without
+uploading another photo, creating another complaint or calling Wise again.
+
+* A retry while the first request is still handled gets ``409 Conflict``.
+* A key reused for a different request gets ``422 Unprocessable Entity``.
+* If the request fails, the key is released, so that it can be retried.
+
+The keys belong to the user of the access token and expire after
+``IDEMPOTENCY_KEY_TTL_HOURS``. Requests without a key, or without a valid
+token, are handled as usual.
+"""
+from __future__ import annotations
+
+import hashlib
+import re
+import typing
+from datetime import datetime, timedelta
+
+import anyio
+from sqlmodel.ext.asyncio.session import AsyncSession
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse, Response
+
+from .core import security, settings
+from .crud import idempotency_key
+from .database import engine
+from .exc import NotUniqueError
+from .models.idempotency import IdempotencyKeyCreate
+
+if typing.TYPE_CHECKING:
+    from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+    from .models.idempotency import IdempotencyKey
+
+#: The request header holding the key
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+
+#: The response header that marks a stored response
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+#: The longest key a client may choose
+MAX_KEY_LENGTH = 255
+
+
+def default_routes() -> list[tuple[str, re.Pattern[str]]]:
+    """Get the requests that accept an idempotency key, as method and path."""
+    api = re.escape(settings.API_VERSION_URL)
+    return [
+        ("POST", re.compile(rf"{api}/complaints/")),
+        ("PUT", re.compile(rf"{api}/complaints/\d+/(approve|reject)")),
+    ]
+
+
+def _fingerprint(scope: Scope, headers: Headers, body: bytes) -> str:
+    # the boundary of a multipart body is random, so that a client may pick
+    # another one for the retry of the same request
+    _, _, boundary = headers.get("content-type", "").partition("boundary=")
+    if boundary:
+        body = body.replace(boundary.strip('"').encode(), b"")
+    digest = hashlib.sha256()
+    for part in [scope["method"].encode(), scope["raw_path"], body]:
+        digest.update(part + b"\0")
+    digest.update(scope["query_string"])
+    return digest.hexdigest()
+
+
+async def _read_body(receive: Receive) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            return b"".join(chunks)
+
+
+def _replay_body(body: bytes, receive: Receive) -> Receive:
+    body_sent = False
+
+    async def replay_body() -> Message:
+        nonlocal body_sent
+        if body_sent:
+            return await receive()
+        body_sent = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    return replay_body
+
+
+class IdempotencyMiddleware:
+    """
+    Replays the stored responses of the requests with a known key.
+
+    Args:
+        app: The application to wrap.
+        routes: The requests that accept a key, by default
+            :func:`default_routes`.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        routes: list[tuple[str, re.Pattern[str]]] | None = None,
+    ) -> None:
+        self.app = app
+        self.routes = default_routes() if routes is None else routes
+
+    def _accepts_key(self, scope: Scope) -> bool:
+        return any(
+            scope["method"] == method and pattern.fullmatch(scope["path"])
+            for method, pattern in self.routes
+        )
+
+    async def __call__(
+        self, scope: Scope, receive: Receive, send: Send
+    ) -> None:
+        if scope["type"] != "http" or not self._accepts_key(scope):
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        key = headers.get(IDEMPOTENCY_HEADER)
+        if key is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not key or len(key) > MAX_KEY_LENGTH:
+            response = JSONResponse(
+                {"detail": f"Invalid {IDEMPOTENCY_HEADER} header"},
+                status_code=400,
+            )
+            await response(scope, receive, send)
+            return
+        # without a valid token the endpoint rejects the request itself
+        user_id = security.bearer_token_subject(
+            headers.get("authorization", "")
+        )
+        if user_id is None:
+            await self.app(scope, receive, send)
+            return
+
+        body = await _read_body(receive)
+        obj_in = IdempotencyKeyCreate(
+            key=key,
+            user_id=user_id,
+            fingerprint=_fingerprint(scope, headers, body),
+        )
+        expires_before = datetime.utcnow() - timedelta(
+            hours=settings.IDEMPOTENCY_KEY_TTL_HOURS
+        )
+        key_id: int | None = None
+        earlier: Response | None = None
+        async with AsyncSession(engine) as db:
+            try:
+                db_key, reserved = await idempotency_key.reserve(
+                    db, obj_in=obj_in, expires_before=expires_before
+                )
+            except NotUniqueError:
+                # the key cannot be stored as the user of the token is gone,
+                # which the endpoint rejects itself
+                pass
+            else:
+                assert db_key.id is not None
+                key_id = db_key.id
+                if not reserved:
+                    earlier = self._earlier_response(
+                        db_key, obj_in.fingerprint
+                    )
+        if earlier is not None:
+            await earlier(scope, receive, send)
+            return
+        if key_id is None:
+            await self.app(scope, _replay_body(body, receive), send)
+            return
+
+        await self._handle(scope, receive, send, body=body, key_id=key_id)
+
+    @staticmethod
+    def _earlier_response(
+        db_key: IdempotencyKey, fingerprint: str
+    ) -> Response:
+        if db_key.fingerprint != fingerprint:
+            return JSONResponse(
+                {
+                    "detail": f"The {IDEMPOTENCY_HEADER} has been used for "
+                    "a different request"
+                },
+                status_code=422,
+            )
+        if db_key.status_code is None:
+            return JSONResponse(
+                {
+                    "detail": f"A request with this {IDEMPOTENCY_HEADER} is "
+                    "still in progress"
+                },
+                status_code=409,
+                headers={"Retry-After": "1"},
+            )
+        return Response(
+            db_key.response_body,
+            status_code=db_key.status_code,
+            media_type=db_key.content_type,
+            headers={REPLAYED_HEADER: "true"},
+        )
+
+    async def _handle(
+        self,
+        scope: Scope,
+        receive: Receive,
+        send: Send,
+        *,
+        body: bytes,
+        key_id: int,
+    ) -> None:
+        status_code = 500
+        content_type = None
+        chunks: list[bytes] = []
+
+        async def capture(message: Message) -> None:
+            nonlocal status_code, content_type
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                content_type = Headers(raw=message["headers"]).get(
+                    "content-type"
+                )
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, _replay_body(body, receive), capture)
+        except BaseException:
+            # also when the client went away and the request was cancelled
+            with anyio.CancelScope(shield=True):
+                async with AsyncSession(engine) as db:
+                    await idempotency_key.release(db, id=key_id)
+            raise
+
+        async with AsyncSession(engine) as db:
+            # only a success is final, other responses may change on a retry,
+            # like the 409 of a complaint whose transfer is not issued yet
+            if 200 <= status_code < 300:
+                await idempotency_key.complete(
+                    db,
+                    id=key_id,
+                    status_code=status_code,
+                    content_type=content_type,
+                    body=b"".join(chunks),
+                )
+            else:
+                await idempotency_key.release(db, id=key_id)
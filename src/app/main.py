@@ -1,15 +1,53 @@
 from __future__ import annotations
 
-from fastapi import FastAPI
+import contextlib
+import math
+import typing
+
+from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from sqlmodel import text
+from fastapi.responses import ORJSONResponse
 
+from . import idempotency, metrics, querylog, ratelimit, tracing
 from .api import router
 from .core import settings
+from .database import engine
+from .exc import ServiceUnavailableError
+from .health import HealthMonitor, HealthReport, check_dependencies
+from .services.container import ServiceContainer
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app: FastAPI) -> typing.AsyncIterator[None]:
+    tracer_provider = tracing.configure()
+    app.state.services = await ServiceContainer.start()
+    app.state.health = HealthMonitor(
+        app.state.services,
+        timeout=settings.HEALTH_CHECK_TIMEOUT_SECONDS,
+        ttl=settings.HEALTH_CACHE_SECONDS,
+    )
+    yield
+    await rate_limits.close()
+    # deliver the notifications still waiting for their batch
+    await app.state.services.close()
+    if tracer_provider is not None:
+        tracer_provider.shutdown()
+
 
-app = FastAPI(title=settings.PROJECT_NAME)
+rate_limits = ratelimit.create_backend()
+
+app = FastAPI(
+    title=settings.PROJECT_NAME,
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
+)
 
 app.include_router(router, prefix=settings.API_VERSION_URL)
+app.add_route("/metrics", metrics.export, include_in_schema=False)
+app.add_middleware(idempotency.IdempotencyMiddleware)
+if settings.RATE_LIMIT_ENABLED:
+    # inside CORS, so that browsers can read the rejections
+    app.add_middleware(ratelimit.RateLimitMiddleware, backend=rate_limits)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost"],
@@ -17,18 +55,38 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+if settings.PROFILING_ENABLED:
+    from .profiling import ProfilingMiddleware
+
+    app.add_middleware(ProfilingMiddleware)
+app.add_middleware(querylog.QueryLogMiddleware)
+# outermost, so that the durations cover the other middleware
+app.add_middleware(metrics.MetricsMiddleware)
+app.add_middleware(tracing.TracingMiddleware)
+metrics.register(engine)
 
 
-async def check_services() -> None:
-    from .database import get_db
-    from .services import s3, ses, wise
+@app.exception_handler(ServiceUnavailableError)
+async def service_unavailable_handler(
+    request: Request, e: ServiceUnavailableError
+) -> ORJSONResponse:
+    del request
+    headers = None
+    if e.retry_after is not None:
+        headers = {"Retry-After": str(math.ceil(e.retry_after))}
+    return ORJSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": str(e)},
+        headers=headers,
+    )
 
-    async for db in get_db():
-        await db.execute(text("SELECT 1;"))
 
-    async for _ in wise.get_wise():
-        pass
-    async for _ in ses.get_ses():
-        pass
-    async for _ in s3.get_s3():
-        pass
+async def check_services() -> HealthReport:
+    """Check the database and the external services at the same time."""
+    services = ServiceContainer.create()
+    try:
+        return await check_dependencies(
+            services, timeout=settings.HEALTH_CHECK_TIMEOUT_SECONDS
+        )
+    finally:
+        await services.close()
@@ -0,0 +1,308 @@
+"""Prometheus metrics of the application, exported on ``/metrics``.
+
+* request latency by route, as a histogram of the matched route template so
+  that path parameters do not multiply the series,
+* database query latency by statement type, from the engine events,
+* latency of the methods of the external services,
+* requests rejected by the rate limits,
+* the state of the connection pool, the guards of the services and the
+  shared thread pool, read when the metrics are scraped.
+
+Recording a sample is a dictionary lookup and an addition, cheap enough to
+leave on in production.
+"""
+from __future__ import annotations
+
+import functools
+import time
+import typing
+
+import anyio.to_thread
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from prometheus_client.registry import Collector
+from sqlalchemy import event
+from starlette.responses import Response
+from typing_extensions import ParamSpec
+
+from .services.resilience import CircuitState, guards
+
+if typing.TYPE_CHECKING:
+    from sqlalchemy.engine import Connection, ExecutionContext
+    from sqlalchemy.ext.asyncio import AsyncEngine
+    from starlette.requests import Request
+    from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+P = ParamSpec("P")
+T = typing.TypeVar("T")
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Duration of HTTP requests.",
+    ["method", "route", "status"],
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "Number of HTTP requests being handled.",
+)
+QUERY_DURATION = Histogram(
+    "db_query_duration_seconds",
+    "Duration of database queries.",
+    ["statement"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+QUERY_ERRORS = Counter(
+    "db_query_errors_total",
+    "Number of database queries that failed.",
+    ["statement"],
+)
+SERVICE_CALL_DURATION = Histogram(
+    "service_call_duration_seconds",
+    "Duration of the calls to the external services.",
+    ["service", "method", "outcome"],
+)
+RATE_LIMITED = Counter(
+    "http_rate_limited_total",
+    "Number of HTTP requests rejected by a rate limit.",
+    ["limit"],
+)
+THREADS_BUSY = Gauge(
+    "threadpool_busy_threads",
+    "Number of threads of the shared AnyIO thread pool in use.",
+)
+THREADS_TOTAL = Gauge(
+    "threadpool_threads",
+    "Size of the shared AnyIO thread pool.",
+)
+
+#: The statement types that get their own series, everything else is OTHER
+STATEMENTS = {"SELECT", "INSERT", "UPDATE", "DELETE"}
+
+
+def _statement_type(statement: str) -> str:
+    keyword = statement.lstrip().split(None, 1)[0].upper() if statement else ""
+    return keyword if keyword in STATEMENTS else "OTHER"
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """Time every query of the engine.
+
+    Args:
+        engine: The engine to instrument.
+    """
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def before_cursor_execute(
+        conn: Connection,
+        cursor: typing.Any,
+        statement: str,
+        parameters: typing.Any,
+        context: ExecutionContext | None,
+        executemany: bool,
+    ) -> None:
+        conn.info.setdefault("query_started_at", []).append(
+            time.perf_counter()
+        )
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def after_cursor_execute(
+        conn: Connection,
+        cursor: typing.Any,
+        statement: str,
+        parameters: typing.Any,
+        context: ExecutionContext | None,
+        executemany: bool,
+    ) -> None:
+        started_at = conn.info["query_started_at"].pop()
+        QUERY_DURATION.labels(_statement_type(statement)).observe(
+            time.perf_counter() - started_at
+        )
+
+    @event.listens_for(engine.sync_engine, "handle_error")
+    def handle_error(context: typing.Any) -> None:
+        # the query never reached after_cursor_execute
+        started = context.connection.info.get("query_started_at")
+        if started:
+            started.pop()
+        QUERY_ERRORS.labels(_statement_type(context.statement or "")).inc()
+
+
+def timed(
+    service: str,
+) -> typing.Callable[
+    [typing.Callable[P, typing.Awaitable[T]]],
+    typing.Callable[P, typing.Awaitable[T]],
+]:
+    """Time every call of a coroutine method of an external service.
+
+    Args:
+        service: The name of the service.
+
+    Returns:
+        The decorator.
+    """
+
+    def decorator(
+        func: typing.Callable[P, typing.Awaitable[T]],
+    ) -> typing.Callable[P, typing.Awaitable[T]]:
+        method = func.__name__.lstrip("_")
+
+        @functools.wraps(func)
+        async def wrapper(*args: P.args, **kwargs: P.kwargs) -> T:
+            outcome = "error"
+            started_at = time.perf_counter()
+            try:
+                result = await func(*args, **kwargs)
+                outcome = "success"
+                return result
+            finally:
+                SERVICE_CALL_DURATION.labels(service, method, outcome).observe(
+                    time.perf_counter() - started_at
+                )
+
+        return wrapper
+
+    return decorator
+
+
+class MetricsMiddleware:
+    """
+    Records the duration of every HTTP request by its route.
+
+    A plain ASGI middleware, which unlike ``BaseHTTPMiddleware`` does not
+    wrap the response in another task.
+
+    Args:
+        app: The application to wrap.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(
+        self, scope: Scope, receive: Receive, send: Send
+    ) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        REQUESTS_IN_PROGRESS.inc()
+        started_at = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            REQUESTS_IN_PROGRESS.dec()
+            # the router stores the matched route in the scope
+            route = scope.get("route")
+            REQUEST_DURATION.labels(
+                scope["method"],
+                getattr(route, "path", "unmatched"),
+                str(status_code),
+            ).observe(time.perf_counter() - started_at)
+
+
+class StateCollector(Collector):
+    """
+    Reads the state of the connection pool and the guards when scraped.
+
+    Args:
+        engine: The engine whose connection pool is reported.
+    """
+
+    def __init__(self, engine: AsyncEngine) -> None:
+        self.engine = engine
+
+    def collect(
+        self,
+    ) -> typing.Iterator[GaugeMetricFamily | CounterMetricFamily]:
+        pool = self.engine.pool
+        for name, documentation, attr in (
+            ("db_pool_size", "Size of the connection pool.", "size"),
+            (
+                "db_pool_checked_out",
+                "Connections in use.",
+                "checkedout",
+            ),
+            (
+                "db_pool_overflow",
+                "Connections opened beyond the size of the pool.",
+                "overflow",
+            ),
+        ):
+            # not every pool implementation keeps every count
+            if (count := getattr(pool, attr, None)) is not None:
+                yield GaugeMetricFamily(name, documentation, value=count())
+
+        families = {
+            "in_flight": GaugeMetricFamily(
+                "service_calls_in_flight",
+                "Calls to an external service that are running.",
+                labels=["service"],
+            ),
+            "waiting": GaugeMetricFamily(
+                "service_calls_waiting",
+                "Calls to an external service that wait for their turn.",
+                labels=["service"],
+            ),
+            "utilization": GaugeMetricFamily(
+                "service_utilization",
+                "Share of the concurrent calls of a service in use.",
+                labels=["service"],
+            ),
+            "circuit_open": GaugeMetricFamily(
+                "service_circuit_open",
+                "Whether the circuit of a service is open.",
+                labels=["service"],
+            ),
+        }
+        rejections = CounterMetricFamily(
+            "service_rejections",
+            "Calls to an external service rejected by its guard.",
+            labels=["service"],
+        )
+        for guard in list(guards.values()):
+            stats = guard.stats()
+            families["in_flight"].add_metric([stats.name], stats.in_flight)
+            families["waiting"].add_metric([stats.name], stats.waiting)
+            families["utilization"].add_metric([stats.name], stats.utilization)
+            families["circuit_open"].add_metric(
+                [stats.name], float(stats.state is not CircuitState.CLOSED)
+            )
+            rejections.add_metric([stats.name], stats.rejections)
+        yield from families.values()
+        yield rejections
+
+
+def register(engine: AsyncEngine) -> None:
+    """Instrument the engine and collect the state of the process.
+
+    Args:
+        engine: The engine of the application.
+    """
+    instrument_engine(engine)
+    REGISTRY.register(StateCollector(engine))
+
+
+async def export(request: Request) -> Response:
+    """Export the metrics in the Prometheus text format."""
+    del request
+    # the limiter belongs to the event loop, so it is read here
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    THREADS_BUSY.set(limiter.borrowed_tokens)
+    THREADS_TOTAL.set(limiter.total_tokens)
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
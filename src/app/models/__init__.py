@@ -15,6 +15,27 @@ metadata = SQLModel.metadata
 metadata.naming_convention = NAMING_CONVENTION
 
 
-from . import complaint, transaction, user  # noqa: E402
+from . import (  # noqa: E402
+    archive,
+    complaint,
+    idempotency,
+    ingestion,
+    job,
+    refresh_token,
+    stats,
+    transaction,
+    user,
+)
 
-__all__ = ["metadata", "user", "complaint", "transaction"]
+__all__ = [
+    "metadata",
+    "user",
+    "complaint",
+    "transaction",
+    "stats",
+    "archive",
+    "ingestion",
+    "job",
+    "idempotency",
+    "refresh_token",
+]
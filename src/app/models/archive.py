@@ -0,0 +1,35 @@
+# isort: dont-add-imports
+
+from datetime import datetime  # noqa: TC003
+
+from sqlmodel import Field, func
+
+from .base import SQLBase
+from .complaint import ComplaintBase
+from .transaction import TransactionBase
+
+
+class ComplaintArchive(SQLBase, ComplaintBase, table=True):
+    """A closed complaint moved out of the ``complaint`` table.
+
+    The archived complaint keeps the ``id`` it had in the ``complaint`` table,
+    which is never handed out to another complaint.
+    """
+
+    complainer_id: int = Field(default=None, foreign_key="user.id", index=True)
+    archived_at: datetime | None = Field(
+        nullable=False,
+        sa_column_kwargs={
+            "server_default": func.now(),
+        },
+    )
+
+
+class TransactionArchive(SQLBase, TransactionBase, table=True):
+    """The transaction of an archived complaint."""
+
+    complaint_id: int = Field(
+        foreign_key="complaintarchive.id",
+        index=True,
+        unique=True,
+    )
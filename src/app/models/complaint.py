@@ -7,16 +7,17 @@ from pydantic import HttpUrl  # noqa: TC002
 from sqlmodel import Column, Field, Relationship, SQLModel, Text, func
 
 from .base import Monetary, SQLBase
-from .enums import ComplaintStatus
+from .enums import ComplaintStatus, TransferStatus
 
 
 class ComplaintBase(SQLModel):
     title: str = Field(max_length=120)
     description: str = Field(sa_column=Column(Text(), nullable=False))
     photo_url: HttpUrl
-    amount: Monetary
+    amount: Monetary = Field(index=True)
     created_at: datetime | None = Field(
         nullable=False,
+        index=True,
         sa_column_kwargs={
             "server_default": func.now(),
         },
@@ -27,6 +28,12 @@ class ComplaintBase(SQLModel):
             "server_default": ComplaintStatus.PENDING.name,
         },
     )
+    transfer_status: TransferStatus | None = Field(
+        nullable=False,
+        sa_column_kwargs={
+            "server_default": TransferStatus.PENDING.name,
+        },
+    )
 
 
 class ComplaintCreateUser(SQLModel):
@@ -46,6 +53,27 @@ class ComplaintCreate(SQLModel):
     amount: Monetary
 
 
+class ComplaintCreateFromKey(SQLModel):
+    """Complaint data whose photo has been uploaded by the complainer."""
+
+    title: str = Field(max_length=120)
+    description: str
+    amount: Monetary
+    photo_key: str = Field(max_length=200, regex=r"^[\w.-]+$")
+
+
+class ComplaintPhotoRead(SQLModel):
+    """A photo uploaded for a later complaint."""
+
+    photo_key: str
+
+
+class ComplaintBatchCreate(SQLModel):
+    complaints: list[ComplaintCreateFromKey] = Field(
+        min_items=1, max_items=500
+    )
+
+
 class ComplaintUpdate(SQLModel):
     title: str | None = Field(default=None, max_length=120)
     description: str | None = None
@@ -62,6 +90,7 @@ class ComplaintRead(SQLModel):
     amount: Monetary
     created_at: datetime
     status: ComplaintStatus
+    transfer_status: TransferStatus
 
 
 class ComplaintReadWithUser(ComplaintRead):
@@ -69,6 +98,9 @@ class ComplaintReadWithUser(ComplaintRead):
 
 
 class Complaint(SQLBase, ComplaintBase, table=True):
+    # archived complaints keep their ids, SQLite must not hand them out again
+    __table_args__ = {"sqlite_autoincrement": True}
+
     complainer_id: int = Field(default=None, foreign_key="user.id", index=True)
     user: Optional["User"] = Relationship(
         back_populates="complaints",
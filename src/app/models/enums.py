@@ -13,3 +13,16 @@ class ComplaintStatus(enum.Enum):
     PENDING = "pending"
     APPROVED = "approved"
     REJECTED = "rejected"
+
+
+class TransferStatus(enum.Enum):
+    PENDING = "pending"
+    ISSUED = "issued"
+    FAILED = "failed"
+
+
+class JobStatus(enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
@@ -0,0 +1,52 @@
+# isort: dont-add-imports
+
+from datetime import datetime  # noqa: TC003
+
+from sqlmodel import (
+    Column,
+    Field,
+    LargeBinary,
+    SQLModel,
+    UniqueConstraint,
+    func,
+)
+
+from .base import SQLBase
+
+
+class IdempotencyKeyBase(SQLModel):
+    key: str = Field(max_length=255)
+    user_id: int = Field(foreign_key="user.id")
+    fingerprint: str = Field(max_length=64)
+    status_code: int | None = None
+    content_type: str | None = Field(default=None, max_length=255)
+    response_body: bytes | None = Field(
+        default=None, sa_column=Column(LargeBinary(), nullable=True)
+    )
+    created_at: datetime | None = Field(
+        nullable=False,
+        index=True,
+        sa_column_kwargs={
+            "server_default": func.now(),
+        },
+    )
+
+
+class IdempotencyKeyCreate(SQLModel):
+    key: str = Field(max_length=255)
+    user_id: int
+    fingerprint: str = Field(max_length=64)
+
+
+class IdempotencyKeyUpdate(SQLModel):
+    pass
+
+
+class IdempotencyKey(SQLBase, IdempotencyKeyBase, table=True):
+    """The response to a request sent with an ``Idempotency-Key`` header.
+
+    The key is reserved before the request is handled, with an empty
+    ``status_code``, and the response is stored once it succeeded.
+    """
+
+    __table_args__ = (UniqueConstraint("user_id", "key"),)
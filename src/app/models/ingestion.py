@@ -0,0 +1,44 @@
+# isort: dont-add-imports
+
+from datetime import datetime  # noqa: TC003
+
+from sqlmodel import Field, SQLModel, func
+
+from .base import SQLBase
+
+
+class IngestionJobBase(SQLModel):
+    total: int
+    succeeded: int = 0
+    failed: int = 0
+    created_at: datetime | None = Field(
+        nullable=False,
+        sa_column_kwargs={
+            "server_default": func.now(),
+        },
+    )
+    finished_at: datetime | None = None
+
+
+class IngestionJobCreate(SQLModel):
+    total: int
+    user_id: int
+
+
+class IngestionJobUpdate(SQLModel):
+    pass
+
+
+class IngestionJobRead(SQLModel):
+    id: int
+    total: int
+    succeeded: int
+    failed: int
+    created_at: datetime
+    finished_at: datetime | None
+
+
+class IngestionJob(SQLBase, IngestionJobBase, table=True):
+    """Progress of issuing the transfers of a batch of complaints."""
+
+    user_id: int = Field(foreign_key="user.id", index=True)
@@ -0,0 +1,55 @@
+# isort: dont-add-imports
+
+from datetime import datetime  # noqa: TC003
+from typing import Any
+
+from sqlmodel import JSON, Column, Field, Index, SQLModel, Text, func
+
+from .base import SQLBase
+from .enums import JobStatus
+
+
+class JobBase(SQLModel):
+    name: str = Field(max_length=100)
+    payload: dict[str, Any] = Field(sa_column=Column(JSON(), nullable=False))
+    status: JobStatus | None = Field(
+        nullable=False,
+        sa_column_kwargs={
+            "server_default": JobStatus.QUEUED.name,
+        },
+    )
+    attempts: int = 0
+    max_attempts: int
+    run_after: datetime
+    last_error: str | None = Field(
+        default=None, sa_column=Column(Text(), nullable=True)
+    )
+    created_at: datetime | None = Field(
+        nullable=False,
+        sa_column_kwargs={
+            "server_default": func.now(),
+        },
+    )
+    finished_at: datetime | None = None
+
+
+class JobCreate(SQLModel):
+    name: str = Field(max_length=100)
+    payload: dict[str, Any]
+    max_attempts: int
+    run_after: datetime
+
+
+class JobUpdate(SQLModel):
+    pass
+
+
+class Job(SQLBase, JobBase, table=True):
+    """A unit of background work that is retried until it succeeds.
+
+    Jobs are claimed by the workers in ``run_after`` order. A running job
+    keeps its ``run_after`` pushed into the future, so the job of a worker
+    that died is picked up again once that lease expires.
+    """
+
+    __table_args__ = (Index("ix_job_status_run_after", "status", "run_after"),)
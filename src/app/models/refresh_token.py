@@ -0,0 +1,41 @@
+# isort: dont-add-imports
+
+from datetime import datetime  # noqa: TC003
+
+from sqlmodel import Field, SQLModel, func
+
+from .base import SQLBase
+
+
+class RefreshTokenBase(SQLModel):
+    token_hash: str = Field(max_length=64, unique=True)
+    family: str = Field(max_length=32, index=True)
+    user_id: int = Field(foreign_key="user.id", index=True)
+    expires_at: datetime
+    revoked_at: datetime | None = None
+    created_at: datetime | None = Field(
+        nullable=False,
+        sa_column_kwargs={
+            "server_default": func.now(),
+        },
+    )
+
+
+class RefreshTokenCreate(SQLModel):
+    token_hash: str = Field(max_length=64)
+    family: str = Field(max_length=32)
+    user_id: int
+    expires_at: datetime
+
+
+class RefreshTokenUpdate(SQLModel):
+    pass
+
+
+class RefreshToken(SQLBase, RefreshTokenBase, table=True):
+    """A refresh token, which is only stored as its hash.
+
+    Every refresh replaces the token with a new one of the same family. Once
+    a replaced token is used again, it has been stolen or leaked, and the
+    whole family is revoked.
+    """
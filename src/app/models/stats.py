@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+from sqlmodel import Field, SQLModel
+
+from .base import Monetary
+from .enums import ComplaintStatus
+
+
+class ComplaintStatsBase(SQLModel):
+    user_id: int = Field(foreign_key="user.id", primary_key=True)
+    status: ComplaintStatus = Field(primary_key=True)
+    complaint_count: int = Field(default=0)
+    total_amount: Monetary = Field(default=0)
+
+
+class ComplaintStatsRead(ComplaintStatsBase):
+    pass
+
+
+class ComplaintStats(ComplaintStatsBase, table=True):
+    """
+    Running totals of the complaints of a user, grouped by status.
+
+    The rows are kept up to date by ``CRUDComplaint`` whenever a complaint is
+    created, changes status or is deleted.
+    """
@@ -8,6 +8,13 @@ class Token(SQLModel):
 
     access_token: str
     token_type: str
+    refresh_token: str | None = None
+
+
+class RefreshRequest(SQLModel):
+    """A refresh token as sent by the user."""
+
+    refresh_token: str
 
 
 class TokenPayload(SQLModel):
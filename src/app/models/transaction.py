@@ -28,4 +28,6 @@ class TransactionUpdate(SQLModel):
 
 
 class Transaction(SQLBase, TransactionBase, table=True):
-    pass
+    # archived transactions keep their ids, SQLite must not hand them out
+    # again
+    __table_args__ = {"sqlite_autoincrement": True}
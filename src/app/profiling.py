@@ -0,0 +1,145 @@
+"""Statistical profiles of single requests.
+
+The middleware is only installed when ``PROFILING_ENABLED`` is set, and this
+module, along with pyinstrument, is only imported then. A request is profiled
+
+* when an admin sends the ``X-Profile`` header, in which case the profile is
+  returned instead of the response, or
+* when it is sampled at ``PROFILING_SAMPLE_RATE``, in which case the profile
+  is stored in ``PROFILING_DIRECTORY``.
+
+The profiles are in the speedscope format, which https://www.speedscope.app
+and other flamegraph viewers open.
+"""
+from __future__ import annotations
+
+import random
+import re
+import typing
+from datetime import datetime
+from pathlib import Path
+
+import anyio.to_thread
+from pyinstrument import Profiler
+from pyinstrument.renderers import SpeedscopeRenderer
+from sqlmodel.ext.asyncio.session import AsyncSession
+from starlette.datastructures import Headers
+
+from .core import security, settings
+from .crud import user as user_crud
+from .database import engine
+from .models.enums import Role
+
+if typing.TYPE_CHECKING:
+    from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+#: The request header that asks for the profile of the request
+PROFILE_HEADER = "x-profile"
+
+
+async def is_admin(headers: Headers) -> bool:
+    """Check if the bearer token of a request belongs to an admin.
+
+    Args:
+        headers: The headers of the request.
+
+    Returns:
+        ``False`` if the token is missing or invalid, or the user is not an
+        admin.
+    """
+    user_id = security.bearer_token_subject(headers.get("authorization", ""))
+    if user_id is None:
+        return False
+    async with AsyncSession(engine) as db:
+        db_user = await user_crud.get(db, id=user_id)
+    return db_user is not None and db_user.role == Role.ADMIN
+
+
+class ProfilingMiddleware:
+    """
+    Profiles the requests an admin asks for and a sample of the others.
+
+    Args:
+        app: The application to wrap.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        self.directory = Path(settings.PROFILING_DIRECTORY)
+
+    async def __call__(
+        self, scope: Scope, receive: Receive, send: Send
+    ) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        # the header of anyone else is ignored, not rejected
+        if PROFILE_HEADER in headers and await is_admin(headers):
+            await self._return_profile(scope, receive, send)
+        elif random.random() < settings.PROFILING_SAMPLE_RATE:
+            await self._store_profile(scope, receive, send)
+        else:
+            await self.app(scope, receive, send)
+
+    def _profiler(self) -> Profiler:
+        # only the task of the request is sampled, not the concurrent ones
+        return Profiler(
+            interval=settings.PROFILING_INTERVAL_SECONDS,
+            async_mode="enabled",
+        )
+
+    async def _return_profile(
+        self, scope: Scope, receive: Receive, send: Send
+    ) -> None:
+        status_code = 500
+
+        async def discard(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+
+        profiler = self._profiler()
+        profiler.start()
+        try:
+            await self.app(scope, receive, discard)
+        finally:
+            profiler.stop()
+
+        body = profiler.output(renderer=SpeedscopeRenderer()).encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"x-profiled-status", str(status_code).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+    async def _store_profile(
+        self, scope: Scope, receive: Receive, send: Send
+    ) -> None:
+        profiler = self._profiler()
+        profiler.start()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            profiler.stop()
+            # the response has been sent, the client does not wait for this
+            path = re.sub(r"[^\w-]+", "_", scope["path"]).strip("_")
+            name = f"{datetime.utcnow():%Y%m%dT%H%M%S%f}-{scope['method']}"
+            await anyio.to_thread.run_sync(
+                self._write,
+                self.directory / f"{name}-{path}.speedscope.json",
+                profiler.output(renderer=SpeedscopeRenderer()),
+            )
+
+    @staticmethod
+    def _write(path: Path, profile: str) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(profile)
@@ -0,0 +1,225 @@
+"""Visibility into the queries the application runs.
+
+* Queries slower than ``SLOW_QUERY_THRESHOLD_SECONDS`` are logged with their
+  parameters and the endpoint that ran them.
+* The queries of every request are counted, and a statement run over and
+  over within one request, the telltale sign of an N+1 pattern, is logged
+  once the request is done.
+* :func:`assert_max_queries` fails a test that runs more queries than
+  expected, so that such regressions fail CI.
+"""
+from __future__ import annotations
+
+import collections
+import contextlib
+import contextvars
+import logging
+import time
+import typing
+
+from sqlalchemy import event
+
+from .core import settings
+
+if typing.TYPE_CHECKING:
+    from sqlalchemy.engine import Connection, ExecutionContext
+    from sqlalchemy.ext.asyncio import AsyncEngine
+    from starlette.types import ASGIApp, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+#: Longest representation of the parameters of a slow query in the log
+MAX_PARAMETERS_LENGTH = 500
+
+
+class QueryTracker:
+    """
+    Counts the queries run within a block of code, like a request.
+
+    Args:
+        name: Describes the block in the log, like the endpoint.
+    """
+
+    def __init__(self, name: str | None = None) -> None:
+        self.name = name
+        self.statements: collections.Counter[str] = collections.Counter()
+
+    @property
+    def count(self) -> int:
+        return sum(self.statements.values())
+
+    def repeated(self, threshold: int) -> dict[str, int]:
+        """Get the statements run at least ``threshold`` times.
+
+        Args:
+            threshold: The number of runs that make a statement suspicious.
+
+        Returns:
+            The number of runs of every suspicious statement.
+        """
+        return {
+            statement: count
+            for statement, count in self.statements.items()
+            if count >= threshold
+        }
+
+
+_tracker: contextvars.ContextVar[QueryTracker | None] = contextvars.ContextVar(
+    "query_tracker", default=None
+)
+# trackers that count the queries of every thread and task, see
+# assert_max_queries
+_global_trackers: list[QueryTracker] = []
+
+
+@contextlib.contextmanager
+def track_queries(name: str | None = None) -> typing.Iterator[QueryTracker]:
+    """Count the queries run within the block.
+
+    The queries of the tasks started within the block are counted as well.
+
+    Args:
+        name: Describes the block in the log, like the endpoint.
+
+    Returns:
+        The tracker, which is filled in as the block runs.
+    """
+    tracker = QueryTracker(name)
+    token = _tracker.set(tracker)
+    try:
+        yield tracker
+    finally:
+        _tracker.reset(token)
+
+
+@contextlib.contextmanager
+def assert_max_queries(
+    expected: int, *, max_repeats: int | None = None
+) -> typing.Iterator[QueryTracker]:
+    """Fail if the block runs more queries than expected.
+
+    Every query of the process counts, including those of an application run
+    on another thread by a test client. Meant for tests, for example::
+
+        with assert_max_queries(8, max_repeats=2):
+            client.put(f"/api/v1/complaints/{id}/approve", headers=headers)
+
+    Args:
+        expected: The most queries the block may run.
+
+    Keyword Args:
+        max_repeats: The most times the block may run the same statement.
+
+    Returns:
+        The tracker of the queries of the block.
+
+    Raises:
+        AssertionError: Raised if the block ran too many queries.
+    """
+    tracker = QueryTracker()
+    _global_trackers.append(tracker)
+    try:
+        yield tracker
+    finally:
+        _global_trackers.remove(tracker)
+
+    if tracker.count > expected:
+        statements = "\n".join(
+            f"{count}x {statement}"
+            for statement, count in tracker.statements.most_common()
+        )
+        msg = f"expected at most {expected} queries, got {tracker.count}:\n"
+        raise AssertionError(msg + statements)
+    if max_repeats is not None and (
+        repeated := tracker.repeated(max_repeats + 1)
+    ):
+        statement, count = max(repeated.items(), key=lambda item: item[1])
+        msg = f"statement run {count} times: {statement}"
+        raise AssertionError(msg)
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """Log the slow queries of the engine and count its queries.
+
+    Args:
+        engine: The engine to instrument.
+    """
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def before_cursor_execute(
+        conn: Connection,
+        cursor: typing.Any,
+        statement: str,
+        parameters: typing.Any,
+        context: ExecutionContext | None,
+        executemany: bool,
+    ) -> None:
+        conn.info.setdefault("querylog_started_at", []).append(
+            time.perf_counter()
+        )
+        if (tracker := _tracker.get()) is not None:
+            tracker.statements[statement] += 1
+        for tracker in _global_trackers:
+            tracker.statements[statement] += 1
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def after_cursor_execute(
+        conn: Connection,
+        cursor: typing.Any,
+        statement: str,
+        parameters: typing.Any,
+        context: ExecutionContext | None,
+        executemany: bool,
+    ) -> None:
+        duration = time.perf_counter() - conn.info["querylog_started_at"].pop()
+        if duration < settings.SLOW_QUERY_THRESHOLD_SECONDS:
+            return
+        tracker = _tracker.get()
+        logger.warning(
+            "slow query (%.3f s) in %s: %s; parameters: %.*s",
+            duration,
+            tracker.name if tracker is not None else "no request",
+            statement,
+            MAX_PARAMETERS_LENGTH,
+            repr(parameters),
+        )
+
+    @event.listens_for(engine.sync_engine, "handle_error")
+    def handle_error(context: typing.Any) -> None:
+        started = context.connection.info.get("querylog_started_at")
+        if started:
+            started.pop()
+
+
+class QueryLogMiddleware:
+    """
+    Counts the queries of every request and logs repeated statements.
+
+    Args:
+        app: The application to wrap.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(
+        self, scope: Scope, receive: Receive, send: Send
+    ) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with track_queries(f"{scope['method']} {scope['path']}") as tracker:
+            await self.app(scope, receive, send)
+
+        # the router stores the matched route in the scope
+        if (route := scope.get("route")) is not None:
+            tracker.name = f"{scope['method']} {route.path}"
+        threshold = settings.QUERY_REPEAT_THRESHOLD
+        for statement, count in tracker.repeated(threshold).items():
+            logger.warning(
+                "possible N+1 query, %s ran it %d times: %s",
+                tracker.name,
+                count,
+                statement,
+            )
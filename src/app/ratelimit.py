@@ -0,0 +1,293 @@
+"""Rate limits of the endpoints that are expensive to call.
+
+Logging in and registering hash a password with argon2, and submitting a
+complaint uploads a photo and pays out a transfer. The middleware rejects the
+clients that call them too often with ``429 Too Many Requests`` before the
+body of the request is even read.
+
+Every limit is a token bucket per client address or per user, kept by a
+backend:
+
+* :class:`MemoryBackend` keeps the buckets in the process, so every process
+  of a deployment limits on its own,
+* :class:`RedisBackend` keeps them in Redis, shared by all processes.
+
+The client address is the one the server reports, so behind a proxy run
+uvicorn with ``--proxy-headers``.
+"""
+from __future__ import annotations
+
+import abc
+import collections
+import logging
+import math
+import typing
+
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+
+from . import metrics
+from .core import security, settings
+from .services.resilience import TokenBucket
+
+if typing.TYPE_CHECKING:
+    from redis.asyncio import Redis
+    from starlette.types import ASGIApp, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+#: The most buckets the memory backend keeps, the least recently used ones
+#: are dropped beyond that
+MAX_BUCKETS = 100_000
+
+#: The socket timeout of Redis, a slow server must not hold up every request
+REDIS_TIMEOUT_SECONDS = 0.5
+
+# Takes tokens out of the bucket in KEYS[1] atomically, by the clock of the
+# server. Returns the seconds until the tokens are available as a string, as
+# Lua numbers are truncated to integers in replies.
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or capacity
+local updated = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+local wait = 0
+if tokens < requested then
+    wait = (requested - tokens) / rate
+else
+    tokens = tokens - requested
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+return tostring(wait)
+"""
+
+
+class Limit(typing.NamedTuple):
+    #: Names the limit in the keys of the buckets and in the metrics.
+    name: str
+    #: The requests the limit applies to, as pairs of method and path.
+    routes: frozenset[tuple[str, str]]
+    #: ``ip`` for a bucket per client address, ``user`` for one per user.
+    per: str
+    #: The number of requests per second.
+    rate: float
+    #: The number of requests in a burst.
+    burst: int
+
+
+def default_limits() -> list[Limit]:
+    """Get the limits configured by the settings."""
+    api = settings.API_VERSION_URL
+    login = frozenset(
+        {("POST", f"{api}/login/token"), ("POST", f"{api}/users/register")}
+    )
+    complaints = frozenset(
+        {("POST", f"{api}/complaints/"), ("POST", f"{api}/complaints/batch")}
+    )
+    return [
+        Limit(
+            "login",
+            login,
+            "ip",
+            settings.RATE_LIMIT_LOGIN_PER_MINUTE / 60,
+            settings.RATE_LIMIT_LOGIN_BURST,
+        ),
+        Limit(
+            "complaints",
+            complaints,
+            "ip",
+            settings.RATE_LIMIT_COMPLAINTS_PER_IP_PER_MINUTE / 60,
+            settings.RATE_LIMIT_COMPLAINTS_PER_IP_BURST,
+        ),
+        Limit(
+            "complaints",
+            complaints,
+            "user",
+            settings.RATE_LIMIT_COMPLAINTS_PER_MINUTE / 60,
+            settings.RATE_LIMIT_COMPLAINTS_BURST,
+        ),
+    ]
+
+
+class Backend(abc.ABC):
+    """Keeps the token buckets of the rate limits."""
+
+    @abc.abstractmethod
+    async def take(self, key: str, *, rate: float, capacity: int) -> float:
+        """Take a token out of a bucket, if one is available.
+
+        Args:
+            key: Identifies the bucket.
+
+        Keyword Args:
+            rate: The number of tokens added to the bucket per second.
+            capacity: The maximum number of tokens in the bucket.
+
+        Returns:
+            ``0`` if a token was taken, otherwise the number of seconds until
+            one is available.
+        """
+
+    async def close(self) -> None:  # noqa: B027
+        """Release the resources of the backend, if it holds any."""
+
+
+class MemoryBackend(Backend):
+    """
+    Keeps the token buckets in the memory of the process.
+
+    Args:
+        max_buckets: The most buckets kept at the same time.
+    """
+
+    def __init__(self, max_buckets: int = MAX_BUCKETS) -> None:
+        self.max_buckets = max_buckets
+        self._buckets: collections.OrderedDict[str, TokenBucket] = (
+            collections.OrderedDict()
+        )
+
+    async def take(self, key: str, *, rate: float, capacity: int) -> float:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(
+                rate=rate, capacity=capacity
+            )
+            if len(self._buckets) > self.max_buckets:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+        return bucket.try_acquire()
+
+
+class RedisBackend(Backend):
+    """
+    Keeps the token buckets in Redis, shared by all processes.
+
+    If Redis cannot be reached the requests are let through, as the limits
+    are not worth an outage of the login.
+
+    Args:
+        client: The Redis client, like the one of :meth:`from_url`.
+    """
+
+    def __init__(self, client: Redis) -> None:
+        from redis.exceptions import RedisError
+
+        self.client = client
+        self._script = client.register_script(TOKEN_BUCKET_SCRIPT)
+        self._errors = (RedisError, OSError)
+
+    @classmethod
+    def from_url(cls, url: str) -> RedisBackend:
+        """Create a backend that connects to the server at ``url``."""
+        from redis.asyncio import Redis
+
+        return cls(
+            Redis.from_url(
+                url,
+                socket_timeout=REDIS_TIMEOUT_SECONDS,
+                socket_connect_timeout=REDIS_TIMEOUT_SECONDS,
+            )
+        )
+
+    async def take(self, key: str, *, rate: float, capacity: int) -> float:
+        try:
+            wait = await self._script(
+                keys=[f"ratelimit:{key}"], args=[rate, capacity, 1]
+            )
+        except self._errors as e:
+            logger.warning("rate limit %s not checked: %r", key, e)
+            return 0.0
+        return float(wait)
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+def create_backend() -> Backend:
+    """Create the backend chosen by ``RATE_LIMIT_BACKEND``.
+
+    Raises:
+        ValueError: Raised if the backend is unknown.
+    """
+    if settings.RATE_LIMIT_BACKEND == "memory":
+        return MemoryBackend()
+    if settings.RATE_LIMIT_BACKEND == "redis":
+        return RedisBackend.from_url(settings.RATE_LIMIT_REDIS_URL)
+    msg = f"unknown rate limit backend {settings.RATE_LIMIT_BACKEND!r}"
+    raise ValueError(msg)
+
+
+def _user_id(scope: Scope) -> str | None:
+    # only the signature of the token is checked, the endpoint still rejects
+    # the token of a user that does not exist anymore
+    authorization = Headers(scope=scope).get("authorization", "")
+    user_id = security.bearer_token_subject(authorization)
+    return None if user_id is None else str(user_id)
+
+
+class RateLimitMiddleware:
+    """
+    Rejects the requests that exceed one of the rate limits.
+
+    Args:
+        app: The application to wrap.
+        backend: Keeps the token buckets.
+        limits: The limits, by default those of the settings.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        backend: Backend,
+        limits: typing.Iterable[Limit] | None = None,
+    ) -> None:
+        self.app = app
+        self.backend = backend
+        self.limits: dict[tuple[str, str], list[Limit]] = (
+            collections.defaultdict(list)
+        )
+        for limit in default_limits() if limits is None else limits:
+            for route in limit.routes:
+                self.limits[route].append(limit)
+
+    async def __call__(
+        self, scope: Scope, receive: Receive, send: Send
+    ) -> None:
+        limits = None
+        if scope["type"] == "http":
+            limits = self.limits.get((scope["method"], scope["path"]))
+        if not limits:
+            await self.app(scope, receive, send)
+            return
+
+        for limit in limits:
+            if limit.per == "user":
+                key = _user_id(scope)
+            else:
+                key = scope["client"][0] if scope.get("client") else None
+            # without a valid token the endpoint rejects the request itself
+            if key is None:
+                continue
+            wait = await self.backend.take(
+                f"{limit.name}:{limit.per}:{key}",
+                rate=limit.rate,
+                capacity=limit.burst,
+            )
+            if wait > 0:
+                metrics.RATE_LIMITED.labels(limit.name).inc()
+                response = JSONResponse(
+                    {"detail": "Too many requests"},
+                    status_code=429,
+                    headers={"Retry-After": str(math.ceil(wait))},
+                )
+                await response(scope, receive, send)
+                return
+
+        await self.app(scope, receive, send)
@@ -0,0 +1,146 @@
+"""Helpers shared by the AWS clients."""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import typing
+
+from aiobotocore.config import AioConfig
+from aiobotocore.session import get_session
+from botocore.exceptions import ClientError
+
+from ..core import settings
+
+if typing.TYPE_CHECKING:
+    from aiobotocore.session import ClientCreatorContext
+
+C = typing.TypeVar("C")
+
+#: Error codes AWS uses to ask the client to slow down
+THROTTLING_CODES = {
+    "Throttling",
+    "ThrottlingException",
+    "TooManyRequestsException",
+    "RequestLimitExceeded",
+    "SlowDown",
+}
+
+
+def client_config(*, max_pool_connections: int) -> AioConfig:
+    """Create the configuration of an AWS client.
+
+    Keyword Args:
+        max_pool_connections:
+            The size of the connection pool, which should match the number of
+            concurrent calls the guard of the service allows, so that no call
+            waits for a connection.
+
+    Returns:
+        The client configuration.
+    """
+    return AioConfig(
+        connect_timeout=settings.SERVICE_CONNECT_TIMEOUT_SECONDS,
+        read_timeout=settings.SERVICE_READ_TIMEOUT_SECONDS,
+        max_pool_connections=max_pool_connections,
+        retries={"mode": "standard", "max_attempts": 2},
+    )
+
+
+def create_client(
+    service_name: str,
+    *,
+    max_pool_connections: int,
+    **kwargs: typing.Any,
+) -> ClientCreatorContext[typing.Any]:
+    """Create an asynchronous AWS client.
+
+    The client talks to ``AWS_ENDPOINT_URL`` if it is set, for example to a
+    local stand-in like moto server.
+
+    Args:
+        service_name: The name of the AWS service, like ``"s3"``.
+        kwargs: Additional arguments of the client.
+
+    Keyword Args:
+        max_pool_connections: The size of the connection pool.
+
+    Returns:
+        An asynchronous context manager that opens and closes the client.
+    """
+    # the stubs declare one overload per service, which a service name that
+    # is only known at runtime does not match
+    create: typing.Callable[..., ClientCreatorContext[typing.Any]] = (
+        get_session().create_client
+    )
+    return create(
+        service_name,
+        aws_access_key_id=settings.AWS_ACCESS_KEY,
+        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+        endpoint_url=settings.AWS_ENDPOINT_URL,
+        config=client_config(max_pool_connections=max_pool_connections),
+        **kwargs,
+    )
+
+
+class LazyClient(typing.Generic[C]):
+    """
+    An asynchronous AWS client that is opened on first use.
+
+    Args:
+        service_name: The name of the AWS service, like ``"s3"``.
+        kwargs: Additional arguments of the client.
+
+    Keyword Args:
+        max_pool_connections: The size of the connection pool.
+    """
+
+    def __init__(
+        self,
+        service_name: str,
+        *,
+        max_pool_connections: int,
+        **kwargs: typing.Any,
+    ) -> None:
+        self.service_name = service_name
+        self.max_pool_connections = max_pool_connections
+        self.kwargs = kwargs
+        self._stack = contextlib.AsyncExitStack()
+        self._client: asyncio.Future[C] | None = None
+
+    async def get(self) -> C:
+        # concurrent first calls share a single client
+        if self._client is None or (
+            self._client.done() and self._client.exception() is not None
+        ):
+            self._client = asyncio.ensure_future(
+                self._stack.enter_async_context(
+                    create_client(
+                        self.service_name,
+                        max_pool_connections=self.max_pool_connections,
+                        **self.kwargs,
+                    )
+                )
+            )
+        return await self._client
+
+    async def close(self) -> None:
+        self._client = None
+        await self._stack.aclose()
+
+
+def is_failure(e: Exception) -> bool:
+    """Check if an error of an AWS client means that the service is unhealthy.
+
+    Args:
+        e: The error raised by the client.
+
+    Returns:
+        ``False`` if AWS rejected the request itself.
+    """
+    if isinstance(e, ClientError):
+        status_code = e.response.get("ResponseMetadata", {}).get(
+            "HTTPStatusCode", 500
+        )
+        code = e.response.get("Error", {}).get("Code")
+        return status_code >= 500 or code in THROTTLING_CODES
+    return True
@@ -0,0 +1,120 @@
+"""The clients of the external services, shared by the whole process.
+
+The clients are created, connected and checked once when the process starts,
+so that the first request is not slower than the others, and their connection
+pools are closed when it stops.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import typing
+
+from fastapi import Depends, Request
+from typing_extensions import Annotated
+
+from .s3 import S3Service
+from .ses import SESService
+from .wise import WiseService
+
+logger = logging.getLogger(__name__)
+
+
+class ServiceContainer:
+    """
+    Holds a single client of every external service.
+
+    Keyword Args:
+        wise: The Wise client.
+        s3: The S3 client.
+        ses: The SES client.
+    """
+
+    def __init__(
+        self,
+        *,
+        wise: WiseService,
+        s3: S3Service,
+        ses: SESService,
+    ) -> None:
+        self.wise = wise
+        self.s3 = s3
+        self.ses = ses
+
+    def checks(self) -> dict[str, typing.Callable[[], typing.Awaitable[None]]]:
+        """Get the health check of every service by its name."""
+        return {
+            "wise": self.wise.check,
+            "s3": self.s3.check,
+            "ses": self.ses.check,
+        }
+
+    @classmethod
+    def create(cls) -> ServiceContainer:
+        """Create the clients, without connecting them."""
+        return cls(wise=WiseService(), s3=S3Service(), ses=SESService())
+
+    @classmethod
+    async def start(cls) -> ServiceContainer:
+        """Create the clients and warm them up.
+
+        Every client is checked at the same time, which opens its connections.
+        A service that fails its check is only logged, requests that need it
+        fail until it recovers.
+
+        Returns:
+            The container of the clients.
+        """
+        services = cls.create()
+        checks = services.checks()
+        results = await asyncio.gather(
+            *(check() for check in checks.values()), return_exceptions=True
+        )
+        for name, result in zip(checks, results):
+            if isinstance(result, Exception):
+                logger.warning("%s failed its startup check: %r", name, result)
+        return services
+
+    async def close(self) -> None:
+        """Close the clients, after sending the queued emails."""
+        await asyncio.gather(self.ses.close(), self.s3.close())
+
+
+@contextlib.asynccontextmanager
+async def open_services() -> typing.AsyncIterator[ServiceContainer]:
+    """Start the clients for the duration of the context, like a command."""
+    services = await ServiceContainer.start()
+    try:
+        yield services
+    finally:
+        await services.close()
+
+
+def get_services(request: Request) -> ServiceContainer:
+    """Get the clients started by the lifespan of the application.
+
+    It is generally used with ``fastapi.Depends`` object.
+
+    Args:
+        request: The request being handled.
+
+    Returns:
+        The container of the clients.
+    """
+    return typing.cast("ServiceContainer", request.app.state.services)
+
+
+Services = Annotated[ServiceContainer, Depends(get_services)]
+
+
+def get_wise(services: Services) -> WiseService:
+    return services.wise
+
+
+def get_s3(services: Services) -> S3Service:
+    return services.s3
+
+
+def get_ses(services: Services) -> SESService:
+    return services.ses
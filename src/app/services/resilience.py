@@ -0,0 +1,348 @@
+"""
+Resilience for the calls to external services.
+
+A :class:`Guard` wraps the calls to a service with
+
+* a bulkhead: only a limited number of calls to the service run at the same
+  time, and blocking calls run on threads of the service instead of the
+  shared AnyIO thread pool, so a slow service can only exhaust its own share,
+* a queue timeout: callers that do not get their turn in time fail fast,
+* a circuit breaker: after consecutive failures the service is not called for
+  a while, then a single probe decides whether it has recovered.
+
+A running thread cannot be cancelled, so the duration of the calls themselves
+is bounded by the socket timeouts of the clients.
+"""
+from __future__ import annotations
+
+import enum
+import functools
+import logging
+import time
+import typing
+
+import anyio
+import anyio.to_thread
+from pydantic import BaseModel
+
+from ..core import settings
+from ..exc import ServiceUnavailableError
+
+T = typing.TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+#: Every guard that has been created, by the name of its service
+guards: dict[str, Guard] = {}
+
+
+class CircuitState(enum.Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class GuardStats(BaseModel):
+    name: str
+    state: CircuitState
+    max_concurrency: int
+    in_flight: int
+    #: The share of the threads of the service that are busy
+    utilization: float
+    #: The number of calls queued for a thread
+    waiting: int
+    #: The total number of seconds calls spent queued for a thread
+    wait_seconds: float
+    calls: int
+    failures: int
+    rejections: int
+
+
+class Guard:
+    """
+    Bulkhead and circuit breaker around the calls to a single service.
+
+    Args:
+        name: The name of the service.
+
+    Keyword Args:
+        max_concurrency: The number of calls that may run at the same time.
+        queue_timeout: How long a call may wait for one of the threads.
+        failure_threshold: The consecutive failures that open the circuit.
+        reset_timeout: How long the circuit stays open before a probe.
+        is_failure:
+            Decides whether an exception means that the service is unhealthy.
+            Errors the service answered with on purpose, like a rejected
+            request, should not open the circuit.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        max_concurrency: int,
+        queue_timeout: float,
+        failure_threshold: int,
+        reset_timeout: float,
+        is_failure: typing.Callable[[Exception], bool] = lambda _: True,
+    ) -> None:
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.queue_timeout = queue_timeout
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.is_failure = is_failure
+
+        # created on first use, as they belong to the running event loop
+        self._slots: anyio.Semaphore | None = None
+        self._threads: anyio.CapacityLimiter | None = None
+
+        self._state = CircuitState.CLOSED
+        self._opened_at = 0.0
+        self._consecutive_failures = 0
+        self._probing = False
+
+        self._in_flight = 0
+        self._waiting = 0
+        self._wait_seconds = 0.0
+        self._calls = 0
+        self._failures = 0
+        self._rejections = 0
+
+        guards[name] = self
+
+    @classmethod
+    def from_settings(
+        cls,
+        name: str,
+        *,
+        max_concurrency: int,
+        is_failure: typing.Callable[[Exception], bool],
+    ) -> Guard:
+        """Create a guard configured by the ``SERVICE_*`` settings."""
+        return cls(
+            name,
+            max_concurrency=max_concurrency,
+            queue_timeout=settings.SERVICE_QUEUE_TIMEOUT_SECONDS,
+            failure_threshold=settings.SERVICE_FAILURE_THRESHOLD,
+            reset_timeout=settings.SERVICE_RESET_TIMEOUT_SECONDS,
+            is_failure=is_failure,
+        )
+
+    @property
+    def state(self) -> CircuitState:
+        if (
+            self._state is CircuitState.OPEN
+            and time.monotonic() - self._opened_at >= self.reset_timeout
+        ):
+            return CircuitState.HALF_OPEN
+        return self._state
+
+    def stats(self) -> GuardStats:
+        return GuardStats(
+            name=self.name,
+            state=self.state,
+            max_concurrency=self.max_concurrency,
+            in_flight=self._in_flight,
+            utilization=self._in_flight / self.max_concurrency,
+            waiting=self._waiting,
+            wait_seconds=self._wait_seconds,
+            calls=self._calls,
+            failures=self._failures,
+            rejections=self._rejections,
+        )
+
+    async def run(
+        self,
+        func: typing.Callable[..., T],
+        *args: typing.Any,
+        **kwargs: typing.Any,
+    ) -> T:
+        """Call a blocking function of the service on a worker thread.
+
+        The threads belong to the service, their number is the
+        ``max_concurrency`` of the guard.
+
+        Args:
+            func: The function to call.
+            args: The positional arguments of ``func``.
+            kwargs: The keyword arguments of ``func``.
+
+        Returns:
+            The return value of ``func``.
+
+        Raises:
+            ServiceUnavailableError:
+                Raised if the circuit is open or no thread became available
+                within the queue timeout.
+        """
+        if self._threads is None:
+            self._threads = anyio.CapacityLimiter(self.max_concurrency)
+        return await self.call(
+            anyio.to_thread.run_sync,
+            functools.partial(func, *args, **kwargs),
+            limiter=self._threads,
+        )
+
+    async def call(
+        self,
+        func: typing.Callable[..., typing.Awaitable[T]],
+        *args: typing.Any,
+        **kwargs: typing.Any,
+    ) -> T:
+        """Call a coroutine function of the service.
+
+        Args:
+            func: The coroutine function to call.
+            args: The positional arguments of ``func``.
+            kwargs: The keyword arguments of ``func``.
+
+        Returns:
+            The return value of ``func``.
+
+        Raises:
+            ServiceUnavailableError:
+                Raised if the circuit is open or the service was busy for
+                longer than the queue timeout.
+        """
+        probe = self._admit()
+        if self._slots is None:
+            self._slots = anyio.Semaphore(self.max_concurrency)
+
+        self._waiting += 1
+        queued_at = time.monotonic()
+        acquired = False
+        try:
+            with anyio.fail_after(self.queue_timeout):
+                await self._slots.acquire()
+            acquired = True
+        except TimeoutError as e:
+            self._rejections += 1
+            msg = f"{self.name} is busy"
+            raise ServiceUnavailableError(msg, retry_after=1) from e
+        finally:
+            self._waiting -= 1
+            self._wait_seconds += time.monotonic() - queued_at
+            # also when the caller was cancelled while it waited, otherwise
+            # no other probe would be admitted and the circuit stayed open
+            if probe and not acquired:
+                self._probing = False
+
+        self._in_flight += 1
+        self._calls += 1
+        try:
+            result = await func(*args, **kwargs)
+        except Exception as e:
+            # the service answered, it just did not like the request
+            self._record(succeeded=not self.is_failure(e), probe=probe)
+            raise
+        finally:
+            self._in_flight -= 1
+            self._slots.release()
+            if probe:
+                self._probing = False
+        self._record(succeeded=True, probe=probe)
+        return result
+
+    def _admit(self) -> bool:
+        # returns whether the call probes a half open circuit
+        state = self.state
+        if state is CircuitState.CLOSED:
+            return False
+        if state is CircuitState.HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+
+        self._rejections += 1
+        retry_after = self.reset_timeout - (time.monotonic() - self._opened_at)
+        msg = f"{self.name} is unavailable"
+        raise ServiceUnavailableError(msg, retry_after=max(retry_after, 1))
+
+    def _record(self, *, succeeded: bool, probe: bool) -> None:
+        if succeeded:
+            if self._state is not CircuitState.CLOSED:
+                logger.info("circuit of %s closed", self.name)
+            self._state = CircuitState.CLOSED
+            self._consecutive_failures = 0
+            return
+
+        self._failures += 1
+        self._consecutive_failures += 1
+        if probe or self._consecutive_failures >= self.failure_threshold:
+            if probe or self._state is CircuitState.CLOSED:
+                logger.warning(
+                    "circuit of %s opened after %d consecutive failures",
+                    self.name,
+                    self._consecutive_failures,
+                )
+            self._state = CircuitState.OPEN
+            self._opened_at = time.monotonic()
+
+
+class TokenBucket:
+    """
+    Limits the rate of calls to a service, allowing short bursts.
+
+    Args:
+        rate: The number of tokens added per second.
+        capacity: The maximum number of tokens, the size of a burst.
+    """
+
+    def __init__(self, *, rate: float, capacity: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        # created on first use, as it belongs to the running event loop
+        self._lock: anyio.Lock | None = None
+
+    async def acquire(self, tokens: float = 1) -> None:
+        """Wait until the tokens are available and take them.
+
+        Callers are served in order, so a large request is not starved by
+        small ones.
+
+        Args:
+            tokens: The number of tokens to take.
+
+        Raises:
+            ValueError: Raised if more tokens than the capacity are requested.
+        """
+        if tokens > self.capacity:
+            msg = f"cannot take {tokens} tokens out of {self.capacity}"
+            raise ValueError(msg)
+        if self._lock is None:
+            self._lock = anyio.Lock()
+
+        async with self._lock:
+            self._refill()
+            if self._tokens < tokens:
+                await anyio.sleep((tokens - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= tokens
+
+    def try_acquire(self, tokens: float = 1) -> float:
+        """Take the tokens if they are available, without waiting.
+
+        Meant for buckets that are never waited on, as it does not queue
+        behind the callers of :meth:`acquire`.
+
+        Args:
+            tokens: The number of tokens to take.
+
+        Returns:
+            ``0`` if the tokens were taken, otherwise the number of seconds
+            until they are available.
+        """
+        self._refill()
+        if self._tokens < tokens:
+            return (tokens - self._tokens) / self.rate
+        self._tokens -= tokens
+        return 0.0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
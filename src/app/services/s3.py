@@ -1,53 +1,107 @@
 from __future__ import annotations
 
-from functools import lru_cache
-from typing import IO, AsyncIterable
+import typing
+from typing import IO
 
-import boto3
 from botocore.exceptions import ClientError
-from fastapi.concurrency import run_in_threadpool
 
-from .. import exc
+from .. import exc, metrics, tracing
 from ..core import settings
+from . import aws
+from .resilience import Guard
+
+#: The prefix of the photos a user uploads for later complaints
+UPLOAD_PREFIX = "uploads"
+
+if typing.TYPE_CHECKING:
+    from types_aiobotocore_s3 import S3Client
+
+
+def upload_key(user_id: int, name: str) -> str:
+    """Get the key of a photo a user uploaded for later complaints.
+
+    Every user has a prefix of their own, so a complaint can only refer to
+    the photos of its complainer.
+
+    Args:
+        user_id: The id of the user.
+        name: The name of the photo, as returned by the upload.
+
+    Returns:
+        The key of the object.
+    """
+    return f"{UPLOAD_PREFIX}/{user_id}/{name}"
 
 
 class S3Service:
     def __init__(self) -> None:
-        self._key = settings.AWS_ACCESS_KEY
-        self._secret = settings.AWS_SECRET_ACCESS_KEY
         self._bucket = settings.AWS_BUCKET_NAME
-        self._s3 = boto3.client(
+        self._s3: aws.LazyClient[S3Client] = aws.LazyClient(
+            "s3", max_pool_connections=settings.S3_MAX_CONCURRENCY
+        )
+        self._guard = Guard.from_settings(
             "s3",
-            aws_access_key_id=self._key,
-            aws_secret_access_key=self._secret,
+            max_concurrency=settings.S3_MAX_CONCURRENCY,
+            is_failure=aws.is_failure,
         )
 
+    async def check(self) -> None:
+        """Check that the bucket can be reached, connecting the client."""
+        s3 = await self._s3.get()
+        await self._guard.call(s3.head_bucket, Bucket=self._bucket)
+
+    async def close(self) -> None:
+        await self._s3.close()
+
+    @metrics.timed("s3")
+    @tracing.traced("s3")
     async def upload_fileobj(
         self,
         fileobj: IO[bytes],
         key: str,
         content_type: str,
     ) -> None:
+        s3 = await self._s3.get()
         try:
-            await run_in_threadpool(
-                self._s3.upload_fileobj,
-                fileobj,
-                self._bucket,
-                key,
-                ExtraArgs={"ACL": "public-read", "ContentType": content_type},
+            await self._guard.call(
+                s3.put_object,
+                Bucket=self._bucket,
+                Key=key,
+                Body=fileobj,
+                ACL="public-read",
+                ContentType=content_type,
             )
         except ClientError as e:
             msg = "failed to upload file object"
             raise exc.UploadFailedError(msg) from e
 
-    def get_object_url(self, key: str) -> str:
-        return f"https://{self._bucket}.s3.amazonaws.com/{key}"
-
+    @metrics.timed("s3")
+    @tracing.traced("s3")
+    async def get_content_type(self, key: str) -> str | None:
+        """Get the content type of an uploaded object.
 
-@lru_cache
-def _get_cached_s3_service() -> S3Service:
-    return S3Service()
+        Args:
+            key: The key of the object.
 
+        Returns:
+            The content type or ``None`` if the object does not exist.
+        """
+        s3 = await self._s3.get()
+        try:
+            head = await self._guard.call(
+                s3.head_object, Bucket=self._bucket, Key=key
+            )
+        except ClientError as e:
+            status_code = e.response.get("ResponseMetadata", {}).get(
+                "HTTPStatusCode"
+            )
+            if status_code == 404:
+                return None
+            raise
+        return head.get("ContentType")
 
-async def get_s3() -> AsyncIterable[S3Service]:
-    yield _get_cached_s3_service()
+    def get_object_url(self, key: str) -> str:
+        if settings.AWS_ENDPOINT_URL is not None:
+            endpoint = settings.AWS_ENDPOINT_URL.rstrip("/")
+            return f"{endpoint}/{self._bucket}/{key}"
+        return f"https://{self._bucket}.s3.amazonaws.com/{key}"
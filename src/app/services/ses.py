@@ -1,62 +1,157 @@
 from __future__ import annotations
 
+import asyncio
+import itertools
+import json
+import logging
 import typing
-from functools import lru_cache
-from typing import AsyncIterable
 
-import boto3
-from fastapi.concurrency import run_in_threadpool
+from botocore.exceptions import ClientError
 
+from .. import metrics, tracing
 from ..core import settings
+from . import aws
+from .resilience import Guard, TokenBucket
 
 if typing.TYPE_CHECKING:
     from pydantic import EmailStr
+    from types_aiobotocore_ses import SESClient
+
+logger = logging.getLogger(__name__)
+
+#: The most destinations SES accepts in a single bulk email
+MAX_BULK_DESTINATIONS = 50
+
+#: The email templates, which are created in SES by the
+#: ``sync-email-templates`` command
+TEMPLATES = {
+    "ComplaintDecision": {
+        "SubjectPart": "Complaint {{decision}}!",
+        "TextPart": "Your claim has been {{decision}}!",
+    },
+}
 
 
 class SESService:
     def __init__(self) -> None:
-        self._key = settings.AWS_ACCESS_KEY
-        self._secret = settings.AWS_SECRET_ACCESS_KEY
-        self._ses = boto3.client(
+        self._ses: aws.LazyClient[SESClient] = aws.LazyClient(
             "ses",
+            max_pool_connections=settings.SES_MAX_CONCURRENCY,
             region_name=settings.AWS_SES_REGION_NAME,
-            aws_access_key_id=self._key,
-            aws_secret_access_key=self._secret,
         )
+        self._guard = Guard.from_settings(
+            "ses",
+            max_concurrency=settings.SES_MAX_CONCURRENCY,
+            is_failure=aws.is_failure,
+        )
+        # a batch must fit into a single burst of the rate limit
+        self._batch_size = max(
+            1, min(MAX_BULK_DESTINATIONS, int(settings.SES_MAX_SEND_RATE))
+        )
+        self._rate = TokenBucket(
+            rate=settings.SES_MAX_SEND_RATE, capacity=self._batch_size
+        )
+        self._pending: list[tuple[str, str, dict[str, str]]] = []
+        self._flusher: asyncio.Task[None] | None = None
 
-    async def send_email(
+    async def send_templated_email(
         self,
-        subject: str,
-        text_data: str,
-        to_addresses: list[EmailStr],
+        template: str,
+        to_address: EmailStr,
+        data: dict[str, str],
     ) -> None:
-        await run_in_threadpool(
-            self._ses.send_email,
-            Source=settings.AWS_SES_EMAIL_SENDER,
-            Destination={
-                "ToAddresses": to_addresses,
-                "CcAddresses": [],
-                "BccAddresses": [],
-            },
-            Message={
-                "Subject": {
-                    "Data": subject,
-                    "Charset": "UTF-8",
-                },
-                "Body": {
-                    "Text": {
-                        "Data": text_data,
-                        "Charset": "UTF-8",
-                    }
-                },
-            },
-        )
+        """Queue an email built from a template.
+
+        The email is sent in bulk together with the other emails queued
+        within ``SES_BATCH_WINDOW_SECONDS``. Emails that are still queued when
+        the process is killed are lost, so this is only meant for
+        notifications.
+
+        Args:
+            template: The name of one of the :data:`TEMPLATES`.
+            to_address: The recipient.
+            data: The values of the template variables.
+        """
+        self._pending.append((template, to_address, data))
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush_later())
+
+    async def flush(self) -> None:
+        """Send the queued emails right away."""
+        pending, self._pending = self._pending, []
+        pending.sort(key=lambda email: email[0])
+        for template, emails in itertools.groupby(
+            pending, key=lambda email: email[0]
+        ):
+            destinations = [
+                {
+                    "Destination": {"ToAddresses": [to_address]},
+                    "ReplacementTemplateData": json.dumps(data),
+                }
+                for _, to_address, data in emails
+            ]
+            for start in range(0, len(destinations), self._batch_size):
+                batch = destinations[start : start + self._batch_size]
+                # the quota of SES counts every recipient
+                await self._rate.acquire(len(batch))
+                try:
+                    await self._send_bulk(template, batch)
+                except Exception:
+                    logger.exception(
+                        "failed to send %d %s emails", len(batch), template
+                    )
 
+    async def check(self) -> None:
+        """Check that SES can be reached, connecting the client."""
+        ses = await self._ses.get()
+        await self._guard.call(ses.get_send_quota)
 
-@lru_cache
-def _get_cached_ses_service() -> SESService:
-    return SESService()
+    async def close(self) -> None:
+        """Send the queued emails and close the client."""
+        if self._flusher is not None:
+            await self._flusher
+        await self.flush()
+        await self._ses.close()
 
+    async def _flush_later(self) -> None:
+        # emails queued while a flush is sending are picked up by the next
+        # round, since no other flusher is started while this one runs
+        while self._pending:
+            await asyncio.sleep(settings.SES_BATCH_WINDOW_SECONDS)
+            await self.flush()
+
+    @metrics.timed("ses")
+    @tracing.traced("ses")
+    async def _send_bulk(
+        self, template: str, destinations: list[dict[str, typing.Any]]
+    ) -> None:
+        ses = await self._ses.get()
+        response = await self._guard.call(
+            ses.send_bulk_templated_email,
+            Source=settings.AWS_SES_EMAIL_SENDER,
+            Template=template,
+            DefaultTemplateData="{}",
+            Destinations=destinations,
+        )
+        for destination, status in zip(destinations, response["Status"]):
+            if status.get("Status", "Success") != "Success":
+                logger.error(
+                    "failed to send a %s email to %s: %s",
+                    template,
+                    destination["Destination"]["ToAddresses"][0],
+                    status.get("Error", status["Status"]),
+                )
 
-async def get_ses() -> AsyncIterable[SESService]:
-    yield _get_cached_ses_service()
+    @metrics.timed("ses")
+    @tracing.traced("ses")
+    async def sync_templates(self) -> None:
+        """Create or update the :data:`TEMPLATES` in SES."""
+        ses = await self._ses.get()
+        for name, parts in TEMPLATES.items():
+            template = {"TemplateName": name, **parts}
+            try:
+                await self._guard.call(ses.update_template, Template=template)
+            except ClientError as e:
+                if e.response["Error"]["Code"] != "TemplateDoesNotExist":
+                    raise
+                await self._guard.call(ses.create_template, Template=template)
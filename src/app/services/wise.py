@@ -2,20 +2,57 @@ from __future__ import annotations
 
 import typing
 import uuid
-from functools import lru_cache
 
 import simplejson as json
-from apiron import JsonEndpoint, Service
-from fastapi.concurrency import run_in_threadpool
+from apiron import JsonEndpoint, Service, Timeout
 from pydantic import BaseModel
 from requests import HTTPError
 
-from .. import exc
+from .. import exc, metrics, tracing
 from ..core import settings
 from ..models.base import Monetary  # noqa: TC002
+from .resilience import Guard
 
 T = typing.TypeVar("T", bound="WiseService")
 
+#: The namespace of the ids that identify the transfer of a complaint to Wise
+TRANSFER_NAMESPACE = uuid.UUID("49dbf4af-c03a-4816-a5fa-58c966da8796")
+
+TIMEOUT = Timeout(
+    connection_timeout=settings.SERVICE_CONNECT_TIMEOUT_SECONDS,
+    read_timeout=settings.SERVICE_READ_TIMEOUT_SECONDS,
+)
+
+
+def customer_transaction_id(complaint_id: int) -> uuid.UUID:
+    """Get the id of the transfer that pays out a complaint.
+
+    Wise creates a single transfer per id, so an attempt that is repeated,
+    like the retry of a job, returns the transfer of the first one instead
+    of paying the complaint twice.
+
+    Args:
+        complaint_id: The id of the complaint.
+
+    Returns:
+        The same id for every attempt of the complaint.
+    """
+    return uuid.uuid5(TRANSFER_NAMESPACE, f"complaint-{complaint_id}")
+
+
+def is_failure(e: Exception) -> bool:
+    """Check if an error of the Wise client means that Wise is unhealthy.
+
+    Args:
+        e: The error raised by the client.
+
+    Returns:
+        ``False`` if Wise rejected the request itself.
+    """
+    if isinstance(e, HTTPError) and e.response is not None:
+        return e.response.status_code >= 500
+    return True
+
 
 class WiseSDK(Service):
     @property
@@ -26,21 +63,27 @@ class WiseSDK(Service):
         }
 
     domain = settings.WISE_ENDPOINT
-    profiles = JsonEndpoint(path="/v1/profiles")
+    profiles = JsonEndpoint(path="/v1/profiles", timeout_spec=TIMEOUT)
     create_authenticated_quote = JsonEndpoint(
         path="/v3/profiles/{profile_id}/quotes",
         default_method="POST",
+        timeout_spec=TIMEOUT,
     )
     create_recipient_account = JsonEndpoint(
-        path="/v1/accounts", default_method="POST"
+        path="/v1/accounts", default_method="POST", timeout_spec=TIMEOUT
+    )
+    create_transfer = JsonEndpoint(
+        path="/v1/transfers", default_method="POST", timeout_spec=TIMEOUT
     )
-    create_transfer = JsonEndpoint(path="/v1/transfers", default_method="POST")
     cancel_transfer = JsonEndpoint(
-        path="/v1/transfers/{transfer_id}/cancel", default_method="PUT"
+        path="/v1/transfers/{transfer_id}/cancel",
+        default_method="PUT",
+        timeout_spec=TIMEOUT,
     )
     fund_transfer = JsonEndpoint(
         path="/v3/profiles/{profile_id}/transfers/{transfer_id}/payments",
         default_method="POST",
+        timeout_spec=TIMEOUT,
     )
 
 
@@ -54,19 +97,34 @@ class Transaction(BaseModel):
 class WiseService:
     def __init__(self) -> None:
         self._wise = WiseSDK()
-        self._profile_id = self.get_profile_id()
+        self._guard = Guard.from_settings(
+            "wise",
+            max_concurrency=settings.WISE_MAX_CONCURRENCY,
+            is_failure=is_failure,
+        )
+        self._profile_id: int | None = None
 
-    def get_profile_id(self) -> int:
+    @metrics.timed("wise")
+    @tracing.traced("wise")
+    async def get_profile_id(self) -> int:
         # wise returns two types of profiles: personal and business
-        profile_resp = self._wise.profiles()
+        profile_resp = await self._guard.run(self._wise.profiles)
         _, business = typing.cast("list[dict]", profile_resp)
         self._profile_id = typing.cast("int", business["id"])
         return self._profile_id
 
     @property
     async def profile_id(self) -> int:
+        if self._profile_id is None:
+            return await self.get_profile_id()
         return self._profile_id
 
+    async def check(self) -> None:
+        """Check that Wise can be reached, fetching the profile."""
+        await self.get_profile_id()
+
+    @metrics.timed("wise")
+    @tracing.traced("wise")
     async def create_quote(self, amount: Monetary) -> str:
         """
         Creates a quote and returns the Quote ID as UUID.
@@ -77,7 +135,7 @@ class WiseService:
             "targetAmount": amount,
         }
 
-        quote_resp = await run_in_threadpool(
+        quote_resp = await self._guard.run(
             self._wise.create_authenticated_quote,
             profile_id=await self.profile_id,
             data=json.dumps(quote_data),
@@ -85,6 +143,8 @@ class WiseService:
         quote_resp = typing.cast("dict", quote_resp)
         return typing.cast("str", quote_resp["id"])
 
+    @metrics.timed("wise")
+    @tracing.traced("wise")
     async def create_recipient_account(self, full_name: str, iban: str) -> int:
         recipient_data = {
             "currency": "EUR",
@@ -97,31 +157,37 @@ class WiseService:
             },
         }
 
-        recipient_resp = await run_in_threadpool(
+        recipient_resp = await self._guard.run(
             self._wise.create_recipient_account,
             data=json.dumps(recipient_data),
         )
         recipient_resp = typing.cast("dict", recipient_resp)
         return typing.cast("int", recipient_resp["id"])
 
+    @metrics.timed("wise")
+    @tracing.traced("wise")
     async def create_transfer(
-        self, target_account_id: int, quote_uuid: str
-    ) -> int:
+        self,
+        target_account_id: int,
+        quote_uuid: str,
+        transaction_id: uuid.UUID,
+    ) -> dict[str, typing.Any]:
         transfer_data = {
             "targetAccount": target_account_id,
             "quoteUuid": quote_uuid,
-            "customerTransactionId": str(uuid.uuid4()),
+            "customerTransactionId": str(transaction_id),
         }
-        transfer_resp = await run_in_threadpool(
+        transfer_resp = await self._guard.run(
             self._wise.create_transfer,
             data=json.dumps(transfer_data),
         )
-        transfer_resp = typing.cast("dict", transfer_resp)
-        return typing.cast("int", transfer_resp["id"])
+        return typing.cast("dict[str, typing.Any]", transfer_resp)
 
+    @metrics.timed("wise")
+    @tracing.traced("wise")
     async def cancel_transfer(self, transfer_id: int) -> None:
         try:
-            await run_in_threadpool(
+            await self._guard.run(
                 self._wise.cancel_transfer,
                 transfer_id=transfer_id,
             )
@@ -129,28 +195,54 @@ class WiseService:
             msg = "Transaction has already been cancelled"
             raise exc.CancelledTransactionError(msg) from e
 
+    @metrics.timed("wise")
+    @tracing.traced("wise")
     async def issue_transaction(
         self,
         user_name: str,
         iban: str,
         amount: Monetary,
+        *,
+        transaction_id: uuid.UUID,
     ) -> Transaction:
+        """Create the transfer of an amount to a bank account.
+
+        Args:
+            user_name: The full name of the account holder.
+            iban: The IBAN of the account.
+            amount: The amount in EUR.
+
+        Keyword Args:
+            transaction_id:
+                Identifies the transfer, repeated calls with the same id
+                return the transfer of the first one, like the ids of
+                :func:`customer_transaction_id`.
+
+        Returns:
+            The created transfer.
+        """
         target_account_id = await self.create_recipient_account(
             user_name, iban
         )
         quote_id = await self.create_quote(amount)
-        transfer_id = await self.create_transfer(target_account_id, quote_id)
+        transfer = await self.create_transfer(
+            target_account_id, quote_id, transaction_id
+        )
+        # a repeated call gets the transfer of the first one, which was
+        # created with the recipient and the quote of that call
         return Transaction(
-            quote_id=uuid.UUID(quote_id),
-            transfer_id=transfer_id,
-            target_account_id=target_account_id,
+            quote_id=uuid.UUID(transfer["quoteUuid"]),
+            transfer_id=transfer["id"],
+            target_account_id=transfer["targetAccount"],
             amount=amount,
         )
 
+    @metrics.timed("wise")
+    @tracing.traced("wise")
     async def fund_transfer(self, transfer_id: int) -> None:
         transfer_data = {"type": "BALANCE"}
         try:
-            await run_in_threadpool(
+            await self._guard.run(
                 self._wise.fund_transfer,
                 profile_id=await self.profile_id,
                 transfer_id=transfer_id,
@@ -162,12 +254,3 @@ class WiseService:
                 msg = f"Transaction with id {transfer_id} failed"
                 raise exc.FailedTransactionError(msg) from e
             raise e
-
-
-@lru_cache
-def _get_cached_wise_service() -> WiseService:
-    return WiseService()
-
-
-async def get_wise() -> typing.AsyncIterable[WiseService]:
-    yield _get_cached_wise_service()
@@ -0,0 +1,102 @@
+"""Work that is done outside of the request/response cycle.
+
+The tasks are run by the workers in :mod:`app.worker` with the payload of a
+queued job. A job is retried when its task raises, so the tasks must be safe
+to run more than once. Calls to external services that must not be repeated,
+like creating a Wise transfer, are identified by the job's data, so that the
+service recognizes a repeated attempt.
+"""
+from __future__ import annotations
+
+import typing
+
+from .crud import complaint, ingestion_job, transaction, user
+from .crud.complaint import TRANSFER_TASK
+from .models.enums import TransferStatus
+from .models.transaction import TransactionCreate
+from .services.wise import customer_transaction_id
+
+if typing.TYPE_CHECKING:
+    from sqlmodel.ext.asyncio.session import AsyncSession
+
+    from .services.container import ServiceContainer
+
+Payload = dict[str, typing.Any]
+Handler = typing.Callable[
+    ["AsyncSession", "ServiceContainer", Payload], typing.Awaitable[None]
+]
+
+
+class Task(typing.NamedTuple):
+    #: Runs a single attempt of a job.
+    run: Handler
+    #: Cleans up after the last attempt of a job has failed.
+    on_failure: Handler | None = None
+
+
+async def issue_transfer(
+    db: AsyncSession, services: ServiceContainer, payload: Payload
+) -> None:
+    """Create the Wise transfer that pays out a complaint and store it.
+
+    Args:
+        db:
+            Asynchronous SQLAlchemy session object used to perform database
+            operations.
+        services: The clients of the external services.
+        payload:
+            The ``complaint_id`` and optionally the ``ingestion_job_id`` that
+            tracks the outcome.
+    """
+    db_complaint = await complaint.get(db, id=payload["complaint_id"])
+    # the complaint may have been deleted or paid out by an earlier attempt
+    if (
+        db_complaint is None
+        or db_complaint.transfer_status != TransferStatus.PENDING
+    ):
+        return
+
+    db_user = await user.get(db, id=db_complaint.complainer_id)
+    assert db_user is not None
+    assert db_user.iban is not None
+    assert db_complaint.id is not None
+    wise_transaction = await services.wise.issue_transaction(
+        f"{db_user.first_name} {db_user.last_name}",
+        db_user.iban,
+        db_complaint.amount,
+        transaction_id=customer_transaction_id(db_complaint.id),
+    )
+
+    # the status and the progress are committed along with the transaction
+    await complaint.set_transfer_status(
+        db, id=db_complaint.id, status=TransferStatus.ISSUED
+    )
+    if (ingestion_job_id := payload.get("ingestion_job_id")) is not None:
+        await ingestion_job.record_result(
+            db, id=ingestion_job_id, succeeded=True
+        )
+    transaction_in = TransactionCreate(
+        **wise_transaction.dict(),
+        complaint_id=db_complaint.id,
+    )
+    await transaction.create(db, obj_in=transaction_in)
+
+
+async def fail_transfer(
+    db: AsyncSession, services: ServiceContainer, payload: Payload
+) -> None:
+    del services
+    await complaint.set_transfer_status(
+        db, id=payload["complaint_id"], status=TransferStatus.FAILED
+    )
+    if (ingestion_job_id := payload.get("ingestion_job_id")) is not None:
+        await ingestion_job.record_result(
+            db, id=ingestion_job_id, succeeded=False
+        )
+    await db.commit()
+
+
+#: The tasks by the name jobs refer to them with
+TASKS: dict[str, Task] = {
+    TRANSFER_TASK: Task(issue_transfer, on_failure=fail_transfer),
+}
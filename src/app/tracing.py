@@ -0,0 +1,256 @@
+"""OpenTelemetry tracing of the requests, the queries and the service calls.
+
+The spans are created with the OpenTelemetry API, which does nothing until
+:func:`configure` installs the SDK of the ``tracing`` extra. Then they are
+exported, according to ``TRACING_EXPORTER``, to an OTLP collector or to a
+file with one JSON span per line, which needs no collector at all.
+
+The trace context of a request is stored in the payload of the jobs it
+queues, so that the work of the job shows up in the trace of the request.
+"""
+from __future__ import annotations
+
+import contextlib
+import functools
+import inspect
+import typing
+from pathlib import Path
+
+from opentelemetry import propagate, trace
+from opentelemetry.trace import SpanKind, Status, StatusCode
+from sqlalchemy import event
+from starlette.datastructures import Headers
+from typing_extensions import ParamSpec
+
+from .core import settings
+
+if typing.TYPE_CHECKING:
+    from opentelemetry.sdk.trace import TracerProvider
+    from sqlalchemy.engine import Connection, ExecutionContext
+    from sqlalchemy.ext.asyncio import AsyncEngine
+    from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+P = ParamSpec("P")
+T = typing.TypeVar("T")
+C = typing.TypeVar("C", bound=type)
+
+#: The key of the trace context in the payload of a job
+PAYLOAD_KEY = "trace_context"
+
+tracer = trace.get_tracer(__name__)
+
+
+def configure() -> TracerProvider | None:
+    """Install the SDK and the exporter chosen by ``TRACING_EXPORTER``.
+
+    Returns:
+        The provider, which must be shut down to flush the last spans, or
+        ``None`` if tracing is disabled.
+
+    Raises:
+        ValueError: Raised if the exporter is unknown.
+    """
+    if settings.TRACING_EXPORTER is None:
+        return None
+
+    from opentelemetry.sdk.resources import SERVICE_NAME, Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import (
+        BatchSpanProcessor,
+        ConsoleSpanExporter,
+        SpanExporter,
+    )
+
+    exporter: SpanExporter
+    if settings.TRACING_EXPORTER == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import (
+            OTLPSpanExporter,
+        )
+
+        exporter = OTLPSpanExporter(endpoint=settings.TRACING_OTLP_ENDPOINT)
+    elif settings.TRACING_EXPORTER == "file":
+        # closed along with the process
+        out = Path(settings.TRACING_FILE).open("a")  # noqa: SIM115
+        exporter = ConsoleSpanExporter(
+            out=out, formatter=lambda span: span.to_json(indent=None) + "\n"
+        )
+    else:
+        msg = f"unknown tracing exporter {settings.TRACING_EXPORTER!r}"
+        raise ValueError(msg)
+
+    provider = TracerProvider(
+        resource=Resource.create({SERVICE_NAME: settings.TRACING_SERVICE_NAME})
+    )
+    provider.add_span_processor(BatchSpanProcessor(exporter))
+    trace.set_tracer_provider(provider)
+    return provider
+
+
+def _in_trace() -> bool:
+    # work outside of a request or a job, like the polling of the workers,
+    # would otherwise start a trace of its own every time
+    return trace.get_current_span().is_recording()
+
+
+def traced(
+    prefix: str,
+) -> typing.Callable[
+    [typing.Callable[P, typing.Awaitable[T]]],
+    typing.Callable[P, typing.Awaitable[T]],
+]:
+    """Run every call of a coroutine function in a span of the current trace.
+
+    Args:
+        prefix: The span is named after the prefix and the function.
+
+    Returns:
+        The decorator.
+    """
+
+    def decorator(
+        func: typing.Callable[P, typing.Awaitable[T]],
+    ) -> typing.Callable[P, typing.Awaitable[T]]:
+        name = f"{prefix}.{func.__name__.lstrip('_')}"
+
+        @functools.wraps(func)
+        async def wrapper(*args: P.args, **kwargs: P.kwargs) -> T:
+            if not _in_trace():
+                return await func(*args, **kwargs)
+            with tracer.start_as_current_span(name):
+                return await func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def trace_methods(cls: C) -> C:
+    """Run the public coroutine methods defined by a class in spans.
+
+    Args:
+        cls: The class, whose methods are replaced.
+
+    Returns:
+        The class.
+    """
+    for name, value in list(vars(cls).items()):
+        if not name.startswith("_") and inspect.iscoroutinefunction(value):
+            setattr(cls, name, traced(cls.__name__)(value))
+    return cls
+
+
+def inject() -> dict[str, str]:
+    """Get the current trace context, to be stored in the payload of a job."""
+    carrier: dict[str, str] = {}
+    propagate.inject(carrier)
+    return carrier
+
+
+@contextlib.contextmanager
+def job_span(
+    name: str, payload: dict[str, typing.Any]
+) -> typing.Iterator[None]:
+    """Run a job in a span of the trace that queued it.
+
+    Args:
+        name: The name of the task.
+        payload: The payload of the job.
+    """
+    parent = propagate.extract(payload.get(PAYLOAD_KEY) or {})
+    with tracer.start_as_current_span(
+        f"job {name}", context=parent, kind=SpanKind.CONSUMER
+    ):
+        yield
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """Run every query of the engine in a span of the current trace.
+
+    Args:
+        engine: The engine to instrument.
+    """
+    system = engine.dialect.name
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def before_cursor_execute(
+        conn: Connection,
+        cursor: typing.Any,
+        statement: str,
+        parameters: typing.Any,
+        context: ExecutionContext | None,
+        executemany: bool,
+    ) -> None:
+        span = None
+        if _in_trace():
+            span = tracer.start_span(
+                statement.lstrip().split(None, 1)[0].upper(),
+                kind=SpanKind.CLIENT,
+                attributes={"db.system": system, "db.statement": statement},
+            )
+        conn.info.setdefault("tracing_spans", []).append(span)
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def after_cursor_execute(
+        conn: Connection,
+        cursor: typing.Any,
+        statement: str,
+        parameters: typing.Any,
+        context: ExecutionContext | None,
+        executemany: bool,
+    ) -> None:
+        if (span := conn.info["tracing_spans"].pop()) is not None:
+            span.end()
+
+    @event.listens_for(engine.sync_engine, "handle_error")
+    def handle_error(exception_context: typing.Any) -> None:
+        spans = exception_context.connection.info.get("tracing_spans")
+        if spans and (span := spans.pop()) is not None:
+            span.record_exception(exception_context.original_exception)
+            span.set_status(Status(StatusCode.ERROR))
+            span.end()
+
+
+class TracingMiddleware:
+    """
+    Runs every HTTP request in a span, continuing the trace of the caller.
+
+    Args:
+        app: The application to wrap.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(
+        self, scope: Scope, receive: Receive, send: Send
+    ) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        parent = propagate.extract(Headers(scope=scope))
+        with tracer.start_as_current_span(
+            f"{scope['method']} {scope['path']}",
+            context=parent,
+            kind=SpanKind.SERVER,
+            attributes={
+                "http.request.method": scope["method"],
+                "url.path": scope["path"],
+            },
+        ) as span:
+
+            async def send_with_status(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    span.set_attribute(
+                        "http.response.status_code", message["status"]
+                    )
+                    if message["status"] >= 500:
+                        span.set_status(Status(StatusCode.ERROR))
+                await send(message)
+
+            await self.app(scope, receive, send_with_status)
+
+            # the router stores the matched route in the scope
+            if (route := scope.get("route")) is not None:
+                span.update_name(f"{scope['method']} {route.path}")
+                span.set_attribute("http.route", route.path)
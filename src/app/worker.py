@@ -0,0 +1,158 @@
+"""A pool of workers running the queued background jobs."""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import random
+import typing
+from datetime import timedelta
+
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from . import tracing
+from .core import settings
+from .crud import job
+from .database import engine
+from .tasks import TASKS
+
+if typing.TYPE_CHECKING:
+    from .services.container import ServiceContainer
+    from .tasks import Payload, Task
+
+logger = logging.getLogger(__name__)
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """Compute the delay before the next attempt of a failed job.
+
+    The delay grows exponentially with the number of attempts up to
+    ``JOB_RETRY_MAX_SECONDS``. It is randomized, so that jobs which failed
+    together, say during an outage of Wise, are not all retried at once.
+
+    Args:
+        attempts: The number of attempts of the job so far.
+
+    Returns:
+        The delay.
+    """
+    delay = min(
+        settings.JOB_RETRY_BASE_SECONDS * 2 ** (attempts - 1),
+        settings.JOB_RETRY_MAX_SECONDS,
+    )
+    return timedelta(seconds=random.uniform(delay / 2, delay))
+
+
+class Worker:
+    """
+    Runs queued jobs with a fixed number of concurrent loops.
+
+    Every job is run in its own session. Any number of workers, in any number
+    of processes, can share the queue.
+    """
+
+    def __init__(
+        self,
+        *,
+        services: ServiceContainer,
+        concurrency: int,
+        poll_interval: float,
+        lease: timedelta,
+    ) -> None:
+        self.services = services
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.lease = lease
+
+    async def run_once(self) -> bool:
+        """Claim a single job and run it.
+
+        Returns:
+            ``False`` if there was no job to run.
+        """
+        async with AsyncSession(engine) as db:
+            db_job = await job.claim(db, lease=self.lease)
+            if db_job is None:
+                return False
+            # the attributes expire whenever the task commits or rolls back
+            assert db_job.id is not None
+            job_id, name, payload = db_job.id, db_job.name, db_job.payload
+            attempts = db_job.attempts
+            final = attempts >= db_job.max_attempts
+
+            task = TASKS.get(name)
+            try:
+                if task is None:
+                    msg = f"unknown task {name!r}"
+                    raise LookupError(msg)
+                with tracing.job_span(name, payload):
+                    await task.run(db, self.services, payload)
+            except Exception as e:
+                logger.exception("job %d (%s) failed", job_id, name)
+                await db.rollback()
+                recorded = await job.fail(
+                    db,
+                    id=job_id,
+                    attempt=attempts,
+                    error=repr(e),
+                    retry_in=None if final else retry_delay(attempts),
+                )
+                if not recorded:
+                    self._lost_lease(job_id, name)
+                elif (
+                    final and task is not None and task.on_failure is not None
+                ):
+                    await self._clean_up(task, db, job_id, payload)
+            else:
+                if not await job.succeed(db, id=job_id, attempt=attempts):
+                    self._lost_lease(job_id, name)
+        return True
+
+    @staticmethod
+    def _lost_lease(job_id: int, name: str) -> None:
+        # another worker claimed the job after the lease expired, the outcome
+        # of its attempt counts
+        logger.warning(
+            "job %d (%s) outlived its lease, its outcome is ignored",
+            job_id,
+            name,
+        )
+
+    async def _clean_up(
+        self,
+        task: Task,
+        db: AsyncSession,
+        job_id: int,
+        payload: Payload,
+    ) -> None:
+        assert task.on_failure is not None
+        try:
+            await task.on_failure(db, self.services, payload)
+        except Exception:
+            # the job has failed for good either way, keep the worker alive
+            logger.exception("cleaning up after job %d failed", job_id)
+            await db.rollback()
+
+    async def run(
+        self,
+        *,
+        stop: asyncio.Event,
+        burst: bool = False,
+    ) -> None:
+        """Run jobs until asked to stop.
+
+        Keyword Args:
+            stop: Once set, the running jobs are finished and no more claimed.
+            burst: Stop as soon as there is no job left to run.
+        """
+
+        async def loop() -> None:
+            while not stop.is_set():
+                if await self.run_once():
+                    continue
+                if burst:
+                    return
+                with contextlib.suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(stop.wait(), self.poll_interval)
+
+        await asyncio.gather(*(loop() for _ in range(self.concurrency)))
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import os
+import tempfile
+import typing
+import uuid
+from pathlib import Path
+
+import httpx
+import pytest
+
+if typing.TYPE_CHECKING:
+    from sqlmodel.ext.asyncio.session import AsyncSession
+
+    from app.models.user import User
+
+ROOT = Path(__file__).parent.parent
+
+#: The password of the :func:`user`
+PASSWORD = "correct horse battery staple"
+
+# the settings are read when the application is first imported, so they are
+# set before any test imports it
+_workdir = Path(tempfile.mkdtemp(prefix="complaint-system-tests-"))
+os.environ.update(
+    {
+        "SECRET_KEY": "test-secret-key",
+        "AWS_ACCESS_KEY": "test",
+        "AWS_SECRET_ACCESS_KEY": "test",
+        "AWS_BUCKET_NAME": "complaints",
+        "AWS_SES_REGION_NAME": "eu-west-1",
+        "AWS_SES_EMAIL_SENDER": "noreply@example.com",
+        "WISE_ENDPOINT": "http://127.0.0.1:9/",
+        "WISE_TOKEN": "test",
+        "DATABASE_URL": f"sqlite+aiosqlite:///{_workdir / 'test.db'}",
+        "RATE_LIMIT_ENABLED": "false",
+    }
+)
+
+
+@pytest.fixture()
+def anyio_backend() -> str:
+    return "asyncio"
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _migrate() -> None:
+    from alembic import command
+    from alembic.config import Config
+
+    config = Config(str(ROOT / "alembic.ini"))
+    config.set_main_option("script_location", str(ROOT / "migrations"))
+    command.upgrade(config, "head")
+
+
+@pytest.fixture()
+async def db(anyio_backend: str) -> typing.AsyncIterator[AsyncSession]:
+    from sqlmodel.ext.asyncio.session import AsyncSession
+
+    from app.database import engine
+
+    async with AsyncSession(engine) as session:
+        yield session
+    # the pooled connections belong to the event loop of the test
+    await engine.dispose()
+
+
+@pytest.fixture()
+async def client(db: AsyncSession) -> typing.AsyncIterator[httpx.AsyncClient]:
+    from app.main import app
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://test"
+    ) as client:
+        yield client
+
+
+@pytest.fixture()
+async def user(db: AsyncSession) -> User:
+    from app.core import security
+    from app.models.user import User
+
+    db_user = User(
+        email=f"{uuid.uuid4().hex}@example.com",
+        first_name="Jane",
+        last_name="Doe",
+        phone="+4915112345678",
+        iban="DE89370400440532013000",
+        password=security.get_password_hash(PASSWORD),
+    )
+    db.add(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+    return db_user
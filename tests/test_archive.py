@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import typing
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+from app.crud import archive, complaint
+from app.models.complaint import ComplaintCreate
+from app.models.enums import ComplaintStatus
+from app.models.user import User
+
+if typing.TYPE_CHECKING:
+    from sqlmodel.ext.asyncio.session import AsyncSession
+
+
+@pytest.mark.anyio()
+async def test_archived_ids_are_not_reused(db: AsyncSession) -> None:
+    db_user = User(
+        email="archive@example.com",
+        first_name="Archie",
+        last_name="Ved",
+        phone="+4915112345678",
+        iban="DE89370400440532013000",
+        password="not-a-hash",
+    )
+    complaint_in = ComplaintCreate(
+        title="Damaged parcel",
+        description="The parcel arrived damaged.",
+        photo_url="https://bucket.s3.amazonaws.com/photo.png",
+        amount=Decimal("10.00"),
+    )
+    db_complaint = await complaint.create(
+        db, obj_in=complaint_in, user=db_user
+    )
+    assert db_complaint.id is not None
+    archived_id = db_complaint.id
+    await complaint.change_status_by_id(
+        db, id=archived_id, status=ComplaintStatus.APPROVED
+    )
+    assert await archive.archive_closed_complaints(
+        db,
+        created_before=datetime.utcnow() + timedelta(days=1),
+        batch_size=100,
+    )
+
+    db_complaint = await complaint.create(
+        db, obj_in=complaint_in, user=db_user
+    )
+    assert db_complaint.id is not None
+    assert db_complaint.id > archived_id
@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import re
+import typing
+import uuid
+from datetime import datetime
+
+import anyio
+import httpx
+import pytest
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from app.core import security
+from app.crud import idempotency_key
+from app.exc import NotUniqueError
+from app.idempotency import IdempotencyMiddleware
+from app.models.idempotency import IdempotencyKeyCreate
+
+if typing.TYPE_CHECKING:
+    from sqlmodel.ext.asyncio.session import AsyncSession
+
+    from app.models.user import User
+
+pytestmark = pytest.mark.anyio()
+
+
+class Endpoint:
+    """Pays out once per call, answering with the next status code."""
+
+    def __init__(self, *status_codes: int) -> None:
+        self.status_codes = list(status_codes)
+        self.calls = 0
+        self.started = anyio.Event()
+        self.release: anyio.Event | None = None
+
+    async def pay(self, request: Request) -> JSONResponse:
+        self.calls += 1
+        self.started.set()
+        if self.release is not None:
+            await self.release.wait()
+        return JSONResponse(
+            {"payout": self.calls, "body": (await request.body()).decode()},
+            status_code=self.status_codes.pop(0),
+        )
+
+
+@pytest.fixture()
+def headers(user: User) -> dict[str, str]:
+    assert user.id is not None
+    token = security.create_access_token(user.id)
+    return {
+        "Authorization": f"Bearer {token}",
+        "Idempotency-Key": uuid.uuid4().hex,
+    }
+
+
+def serve(endpoint: Endpoint, headers: dict[str, str]) -> httpx.AsyncClient:
+    app = Starlette(routes=[Route("/pay", endpoint.pay, methods=["POST"])])
+    middleware = IdempotencyMiddleware(
+        app, routes=[("POST", re.compile("/pay"))]
+    )
+    return httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=middleware),
+        base_url="http://test",
+        headers=headers,
+    )
+
+
+async def test_retry_gets_the_stored_response(
+    headers: dict[str, str],
+) -> None:
+    endpoint = Endpoint(201)
+    async with serve(endpoint, headers) as client:
+        first = await client.post("/pay", content=b"10 EUR")
+        retry = await client.post("/pay", content=b"10 EUR")
+
+    assert endpoint.calls == 1
+    assert first.status_code == retry.status_code == 201
+    assert retry.json() == first.json()
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert "Idempotent-Replayed" not in first.headers
+
+
+async def test_retry_while_in_progress_gets_a_conflict(
+    headers: dict[str, str],
+) -> None:
+    endpoint = Endpoint(201)
+    endpoint.release = anyio.Event()
+    responses: list[httpx.Response] = []
+
+    async with serve(endpoint, headers) as client:
+
+        async def pay() -> None:
+            responses.append(await client.post("/pay", content=b"10 EUR"))
+
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(pay)
+            await endpoint.started.wait()
+            retry = await client.post("/pay", content=b"10 EUR")
+            endpoint.release.set()
+
+    assert retry.status_code == 409
+    assert retry.headers["Retry-After"] == "1"
+    assert endpoint.calls == 1
+    assert responses[0].status_code == 201
+
+
+async def test_key_reused_for_another_request_is_rejected(
+    headers: dict[str, str],
+) -> None:
+    endpoint = Endpoint(201)
+    async with serve(endpoint, headers) as client:
+        await client.post("/pay", content=b"10 EUR")
+        response = await client.post("/pay", content=b"1000 EUR")
+
+    assert response.status_code == 422
+    assert endpoint.calls == 1
+
+
+async def test_failed_request_releases_the_key(
+    headers: dict[str, str],
+) -> None:
+    endpoint = Endpoint(503, 201)
+    async with serve(endpoint, headers) as client:
+        failed = await client.post("/pay", content=b"10 EUR")
+        retry = await client.post("/pay", content=b"10 EUR")
+
+    assert failed.status_code == 503
+    assert retry.status_code == 201
+    assert "Idempotent-Replayed" not in retry.headers
+    assert endpoint.calls == 2
+
+
+async def test_key_that_cannot_be_stored_is_not_retried_forever(
+    db: AsyncSession, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    attempts = 0
+
+    async def create(*args: typing.Any, **kwargs: typing.Any) -> None:
+        # like the insert of a key whose user has been deleted
+        nonlocal attempts
+        attempts += 1
+        raise NotUniqueError
+
+    monkeypatch.setattr(idempotency_key, "create", create)
+    obj_in = IdempotencyKeyCreate(
+        key=uuid.uuid4().hex, user_id=1, fingerprint="fingerprint"
+    )
+    with pytest.raises(NotUniqueError):
+        await idempotency_key.reserve(
+            db, obj_in=obj_in, expires_before=datetime.utcnow()
+        )
+    assert attempts == 2
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import typing
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import delete
+
+from app.crud import job
+from app.models.enums import JobStatus
+from app.models.job import Job
+
+if typing.TYPE_CHECKING:
+    from sqlmodel.ext.asyncio.session import AsyncSession
+
+
+@pytest.mark.anyio()
+async def test_worker_that_lost_its_lease_cannot_record_an_outcome(
+    db: AsyncSession,
+) -> None:
+    await db.execute(delete(Job))
+    await job.enqueue_many(db, name="test", payloads=[{}])
+    await db.commit()
+
+    # the lease of the first worker expires right away
+    first = await job.claim(db, lease=timedelta(0))
+    assert first is not None
+    assert first.id is not None
+    job_id, first_attempt = first.id, first.attempts
+    second = await job.claim(db, lease=timedelta(minutes=5))
+    assert second is not None
+    assert second.id == job_id
+    second_attempt = second.attempts
+    assert second_attempt == first_attempt + 1
+
+    assert not await job.succeed(db, id=job_id, attempt=first_attempt)
+    assert await job.fail(
+        db, id=job_id, attempt=second_attempt, error="error", retry_in=None
+    )
+    db_job = await job.get(db, id=job_id)
+    assert db_job is not None
+    assert db_job.status == JobStatus.FAILED
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import asyncio
+import typing
+import uuid
+from decimal import Decimal
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core import security
+from app.crud import complaint, transaction
+from app.database import engine
+from app.main import app
+from app.models.complaint import ComplaintCreate
+from app.models.enums import Role, TransferStatus
+from app.models.transaction import TransactionCreate
+from app.models.user import User
+from app.querylog import assert_max_queries
+from app.services.container import get_ses, get_wise
+
+#: The number of complaints the listings are checked with
+COMPLAINTS = 10
+
+
+class FakeWise:
+    async def fund_transfer(self, transfer_id: int) -> None:
+        pass
+
+
+class FakeSES:
+    async def send_templated_email(
+        self, template: str, to_address: str, data: dict[str, str]
+    ) -> None:
+        pass
+
+
+class Setup(typing.NamedTuple):
+    headers: dict[str, str]
+    complaint_ids: list[int]
+
+
+async def _create_complaints() -> Setup:
+    async with AsyncSession(engine, expire_on_commit=False) as db:
+        approver, complainer = (
+            User(
+                email=f"{uuid.uuid4().hex}@example.com",
+                first_name="Query",
+                last_name="Log",
+                phone="+4915112345678",
+                iban="DE89370400440532013000",
+                password="not-a-hash",
+                role=role,
+            )
+            for role in (Role.APPROVER, Role.COMPLAINER)
+        )
+        db.add_all([approver, complainer])
+        await db.commit()
+
+        complaint_in = ComplaintCreate(
+            title="Damaged parcel",
+            description="The parcel arrived damaged.",
+            photo_url="https://bucket.s3.amazonaws.com/photo.png",
+            amount=Decimal("10.00"),
+        )
+        ids = await complaint.create_many(
+            db, objs_in=[complaint_in] * COMPLAINTS, user=complainer
+        )
+        # the transfers are issued, as if by the worker
+        for id_ in ids:
+            await complaint.set_transfer_status(
+                db, id=id_, status=TransferStatus.ISSUED
+            )
+            transaction_in = TransactionCreate(
+                quote_id=uuid.uuid4(),
+                transfer_id=id_,
+                target_account_id=1,
+                amount=complaint_in.amount,
+                complaint_id=id_,
+            )
+            await transaction.create(db, obj_in=transaction_in)
+
+    # the pooled connections belong to this event loop
+    await engine.dispose()
+    token = security.create_access_token(approver.id)
+    return Setup({"Authorization": f"Bearer {token}"}, ids)
+
+
+@pytest.fixture()
+def setup() -> Setup:
+    return asyncio.run(_create_complaints())
+
+
+@pytest.fixture()
+def client() -> typing.Iterator[TestClient]:
+    app.dependency_overrides[get_wise] = FakeWise
+    app.dependency_overrides[get_ses] = FakeSES
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+def test_approving_a_complaint_runs_a_fixed_number_of_queries(
+    client: TestClient, setup: Setup
+) -> None:
+    # the transaction, the complaint, its update and refresh, a statistics
+    # upsert per status, and the users of the token and the complaint
+    for complaint_id in setup.complaint_ids[:2]:
+        with assert_max_queries(8, max_repeats=2):
+            response = client.put(
+                f"/api/v1/complaints/{complaint_id}/approve",
+                headers=setup.headers,
+            )
+        assert response.status_code == 200
+
+
+@pytest.mark.parametrize(
+    "path", ["/api/v1/complaints/", "/api/v1/complaints/with-user"]
+)
+def test_listing_complaints_does_not_query_per_complaint(
+    client: TestClient, setup: Setup, path: str
+) -> None:
+    # the user of the token and the complaints, with their complainers
+    with assert_max_queries(2, max_repeats=1):
+        response = client.get(path, headers=setup.headers)
+    assert response.status_code == 200
+    assert len(response.json()) >= COMPLAINTS
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import typing
+
+import httpx
+import pytest
+
+from app.main import app
+from app.ratelimit import Limit, MemoryBackend, RateLimitMiddleware
+
+if typing.TYPE_CHECKING:
+    from sqlmodel.ext.asyncio.session import AsyncSession
+
+    from app.models.user import User
+
+pytestmark = pytest.mark.anyio()
+
+#: A login per minute, after a burst of two
+LOGIN_LIMIT = Limit(
+    "login",
+    frozenset({("POST", "/api/v1/login/token")}),
+    "ip",
+    rate=1 / 60,
+    burst=2,
+)
+
+
+async def test_login_beyond_the_limit_is_rejected(
+    db: AsyncSession, user: User
+) -> None:
+    limited = RateLimitMiddleware(
+        app, backend=MemoryBackend(), limits=[LOGIN_LIMIT]
+    )
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=limited), base_url="http://test"
+    ) as client:
+        responses = [
+            await client.post(
+                "/api/v1/login/token",
+                data={"username": user.email, "password": "wrong"},
+            )
+            for _ in range(3)
+        ]
+
+    assert [response.status_code for response in responses] == [401, 401, 429]
+    assert 0 < int(responses[-1].headers["Retry-After"]) <= 60
+
+
+async def test_memory_backend_drops_the_least_recently_used_bucket() -> None:
+    backend = MemoryBackend(max_buckets=2)
+
+    async def take(key: str) -> float:
+        return await backend.take(key, rate=1 / 60, capacity=1)
+
+    assert await take("a") == 0
+    assert await take("b") == 0
+    # using the bucket of a keeps it, so the one of b is dropped for c
+    assert await take("a") > 0
+    assert await take("c") == 0
+    assert await take("a") > 0
+    assert await take("b") == 0
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import typing
+
+import pytest
+
+from tests.conftest import PASSWORD
+
+if typing.TYPE_CHECKING:
+    import httpx
+
+    from app.models.user import User
+
+pytestmark = pytest.mark.anyio()
+
+
+async def login(client: httpx.AsyncClient, user: User) -> str:
+    response = await client.post(
+        "/api/v1/login/token",
+        data={"username": user.email, "password": PASSWORD},
+    )
+    assert response.status_code == 200
+    return typing.cast("str", response.json()["refresh_token"])
+
+
+async def refresh(
+    client: httpx.AsyncClient, refresh_token: str
+) -> httpx.Response:
+    return await client.post(
+        "/api/v1/login/refresh", json={"refresh_token": refresh_token}
+    )
+
+
+async def test_refresh_replaces_the_token(
+    client: httpx.AsyncClient, user: User
+) -> None:
+    first = await login(client, user)
+
+    response = await refresh(client, first)
+    assert response.status_code == 200
+    second = response.json()["refresh_token"]
+    assert second != first
+    assert response.json()["access_token"]
+
+    assert (await refresh(client, second)).status_code == 200
+
+
+async def test_reused_token_revokes_its_family(
+    client: httpx.AsyncClient, user: User
+) -> None:
+    first = await login(client, user)
+    second = (await refresh(client, first)).json()["refresh_token"]
+
+    # whoever holds the replaced token may have stolen it
+    assert (await refresh(client, first)).status_code == 401
+    assert (await refresh(client, second)).status_code == 401
+
+
+async def test_reused_token_leaves_other_logins_alone(
+    client: httpx.AsyncClient, user: User
+) -> None:
+    first = await login(client, user)
+    other = await login(client, user)
+    await refresh(client, first)
+
+    assert (await refresh(client, first)).status_code == 401
+    assert (await refresh(client, other)).status_code == 200
+
+
+async def test_logout_revokes_the_token(
+    client: httpx.AsyncClient, user: User
+) -> None:
+    first = await login(client, user)
+    second = (await refresh(client, first)).json()["refresh_token"]
+
+    response = await client.post(
+        "/api/v1/login/logout", json={"refresh_token": second}
+    )
+    assert response.status_code == 204
+    assert (await refresh(client, second)).status_code == 401
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import anyio
+import pytest
+
+from app.services.resilience import CircuitState, Guard
+
+
+async def fail_when_set(event: anyio.Event) -> None:
+    await event.wait()
+    raise OSError
+
+
+async def succeed() -> str:
+    return "ok"
+
+
+@pytest.mark.anyio()
+async def test_cancelled_probe_admits_the_next_call() -> None:
+    guard = Guard(
+        "test-cancelled-probe",
+        max_concurrency=1,
+        queue_timeout=10,
+        failure_threshold=1,
+        reset_timeout=0,
+    )
+    first_failure, second_failure = anyio.Event(), anyio.Event()
+
+    async def call_failing(event: anyio.Event) -> None:
+        with pytest.raises(OSError):
+            await guard.call(fail_when_set, event)
+
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(call_failing, first_failure)
+        await anyio.wait_all_tasks_blocked()
+        tg.start_soon(call_failing, second_failure)
+        await anyio.wait_all_tasks_blocked()
+
+        # the first call opens the circuit, the second one takes its slot
+        first_failure.set()
+        await anyio.wait_all_tasks_blocked()
+        assert guard.state is CircuitState.HALF_OPEN
+
+        # the probe waits for the slot, until its caller goes away
+        async with anyio.create_task_group() as probes:
+            probes.start_soon(guard.call, succeed)
+            await anyio.wait_all_tasks_blocked()
+            assert guard.stats().waiting == 1
+            probes.cancel_scope.cancel()
+
+        second_failure.set()
+
+    assert guard.state is CircuitState.HALF_OPEN
+    assert await guard.call(succeed) == "ok"
+    assert guard.state is CircuitState.CLOSED
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import asyncio
+import typing
+
+import pytest
+
+from app.core import settings
+from app.services.ses import SESService
+
+
+class SlowSESService(SESService):
+    def __init__(self) -> None:
+        super().__init__()
+        self.sending = asyncio.Event()
+        self.release = asyncio.Event()
+        self.sent: list[str] = []
+
+    async def _send_bulk(
+        self, template: str, destinations: list[dict[str, typing.Any]]
+    ) -> None:
+        self.sending.set()
+        await self.release.wait()
+        self.sent.extend(
+            destination["Destination"]["ToAddresses"][0]
+            for destination in destinations
+        )
+
+
+@pytest.mark.anyio()
+async def test_email_queued_during_a_flush_is_sent(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(settings, "SES_BATCH_WINDOW_SECONDS", 0.01)
+    ses = SlowSESService()
+
+    await ses.send_templated_email("ComplaintDecision", "a@example.com", {})
+    await asyncio.wait_for(ses.sending.wait(), timeout=1)
+    # the first batch is being sent while the second email is queued
+    await ses.send_templated_email("ComplaintDecision", "b@example.com", {})
+    ses.release.set()
+
+    async def sent_both() -> None:
+        while len(ses.sent) < 2:
+            await asyncio.sleep(0.01)
+
+    await asyncio.wait_for(sent_both(), timeout=1)
+    assert ses.sent == ["a@example.com", "b@example.com"]
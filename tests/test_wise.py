@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import itertools
+import json
+import typing
+import uuid
+from decimal import Decimal
+
+import pytest
+
+from app.services.wise import WiseService, customer_transaction_id
+
+
+class FakeWiseSDK:
+    """Answers like Wise, which creates a single transfer per id."""
+
+    def __init__(self) -> None:
+        self._ids = itertools.count(1)
+        self.transfers: dict[str, dict[str, typing.Any]] = {}
+
+    def profiles(self) -> list[dict[str, typing.Any]]:
+        return [{"id": 1, "type": "personal"}, {"id": 2, "type": "business"}]
+
+    def create_authenticated_quote(
+        self, *, profile_id: int, data: str
+    ) -> dict[str, typing.Any]:
+        return {"id": str(uuid.uuid4())}
+
+    def create_recipient_account(self, *, data: str) -> dict[str, typing.Any]:
+        return {"id": next(self._ids)}
+
+    def create_transfer(self, *, data: str) -> dict[str, typing.Any]:
+        transfer = json.loads(data)
+        return self.transfers.setdefault(
+            transfer["customerTransactionId"],
+            {
+                "id": next(self._ids),
+                "targetAccount": transfer["targetAccount"],
+                "quoteUuid": transfer["quoteUuid"],
+            },
+        )
+
+
+@pytest.mark.anyio()
+async def test_repeated_transaction_records_the_first_transfer() -> None:
+    wise = WiseService()
+    sdk = FakeWiseSDK()
+    wise._wise = sdk  # type: ignore[assignment]
+    transaction_id = customer_transaction_id(1)
+
+    first, repeated = [
+        await wise.issue_transaction(
+            "Jane Doe",
+            "DE89370400440532013000",
+            Decimal("10.00"),
+            transaction_id=transaction_id,
+        )
+        for _ in range(2)
+    ]
+
+    assert len(sdk.transfers) == 1
+    assert repeated == first
+    (transfer,) = sdk.transfers.values()
+    assert repeated.quote_id == uuid.UUID(transfer["quoteUuid"])
+    assert repeated.target_account_id == transfer["targetAccount"]